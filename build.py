@@ -7,23 +7,32 @@ Usage:
     python3 build.py --target stm32f407zgt6   # Cross-compile for F407
     python3 build.py --target pynq-z2         # Cross-compile for PYNQ-Z2
     python3 build.py -c                       # Clean build
+    python3 build.py --build-type Release     # Cross-compile a Release build
     python3 build.py -t                       # Build + run host tests
     python3 build.py -e                       # Build + examples (same as default for now)
     python3 build.py -f                       # Flash to target via J-Link
+    python3 build.py -f --no-reconfigure      # Flash after a ninja-only rebuild
+    python3 build.py -f --force               # Flash even if the image is unchanged
     python3 build.py -f --probe cmsis-dap     # Flash to STM32 via CMSIS-DAP
     python3 build.py -f --target pynq-z2      # Flash to PYNQ-Z2 via OpenOCD
     python3 build.py -d                       # Rebuild DTBs for all boards
     python3 build.py -d --target stm32f407zgt6  # Rebuild DTB for one board
     python3 build.py -c -t                    # Clean + tests
+    python3 build.py -q                       # Build without echoing commands
 """
 
 import argparse
+import functools
+import logging
+import mmap
 import os
+import shlex
 import shutil
 import subprocess
 import sys
 
-PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPT_PATH = os.path.abspath(__file__)
+PROJECT_DIR = os.path.dirname(SCRIPT_PATH)
 BUILD_DIR = os.path.join(PROJECT_DIR, "build")
 TEST_BUILD_DIR = os.path.join(PROJECT_DIR, "build-test")
 TOOLCHAIN_FILE = os.path.join(PROJECT_DIR, "cmake", "arm-none-eabi-gcc.cmake")
@@ -38,20 +47,65 @@ JLINK_DEVICE_MAP = {
     "stm32f407zgt6": "STM32F407ZG",
 }
 
+# Last J-Link flash (device and image hash). The stamp cannot tell which
+# board was flashed, so it is dropped when any other probe flashes and only
+# trusted for a short while after it was written.
+JLINK_STAMP = os.path.join(BUILD_DIR, "flash.jlink.sha")
+JLINK_STAMP_MAX_AGE = 10 * 60  # seconds
+
 # Default app per target
 DEFAULT_APP = {
     "pynq-z2": "hello",
 }
 
+log = logging.getLogger("build")
+
+
+def app_artifact(app, suffix=""):
+    """Path of a built app image: the ELF, or e.g. suffix=".bin"."""
+    return os.path.join(BUILD_DIR, "app", app, app + suffix)
+
 
-def run(cmd, cwd=None):
-    """Run a command, printing it first. Exit on failure."""
-    print(f">>> {' '.join(cmd)}")
-    result = subprocess.run(cmd, cwd=cwd)
+def run(cmd, cwd=None, env=None):
+    """Run a command, logging it first. Exit on failure."""
+    if log.isEnabledFor(logging.INFO):
+        log.info(">>> %s", shlex.join(cmd))
+    result = subprocess.run(cmd, cwd=cwd, env=env)
     if result.returncode != 0:
         sys.exit(result.returncode)
 
 
+def build_jobs():
+    """Number of CPUs this process may use.
+
+    sched_getaffinity honours taskset/cgroup CPU limits in CI containers,
+    where os.cpu_count() reports every core on the host.
+    """
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def build_env(jobs):
+    """Environment for build tools, with CMAKE_BUILD_PARALLEL_LEVEL set."""
+    return {**os.environ, "CMAKE_BUILD_PARALLEL_LEVEL": str(jobs)}
+
+
+def compiler_launcher_args():
+    """cmake arguments that route compiles through ccache, if installed.
+
+    The cache lives in ~/.cache/ccache by default; set CCACHE_DIR to share
+    it between checkouts or keep it on a faster disk.
+    """
+    if shutil.which("ccache") is None:
+        return []
+    return [
+        "-DCMAKE_C_COMPILER_LAUNCHER=ccache",
+        "-DCMAKE_CXX_COMPILER_LAUNCHER=ccache",
+    ]
+
+
 def clean():
     """Remove build directories."""
     for d in [BUILD_DIR, TEST_BUILD_DIR]:
@@ -60,51 +114,156 @@ def clean():
             shutil.rmtree(d)
 
 
+@functools.lru_cache(maxsize=None)
+def _scan_cache_var(cache_file, mtime_ns, name):
+    """Find one NAME:TYPE=value entry in CMakeCache.txt without parsing every line.
+
+    mtime_ns is only part of the memo key, so a rewritten cache is rescanned.
+    """
+    with open(cache_file, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None  # empty file
+
+    with mm:
+        start = mm.find(b"\n" + name.encode() + b":")
+        if start < 0:
+            return None
+        eq = mm.find(b"=", start)
+        end = mm.find(b"\n", eq)
+        if end < 0:
+            end = len(mm)
+        return mm[eq + 1:end].decode().strip()
+
+
+def read_cache_var(build_dir, name):
+    """Return the value of a CMakeCache.txt entry in build_dir, or None."""
+    cache_file = os.path.join(build_dir, "CMakeCache.txt")
+    try:
+        st = os.stat(cache_file)
+    except FileNotFoundError:
+        return None
+    return _scan_cache_var(cache_file, st.st_mtime_ns, name)
+
+
 def check_target_mismatch(target):
-    """Auto-clean if the cached target differs from the requested one."""
-    cache_file = os.path.join(BUILD_DIR, "CMakeCache.txt")
-    if not os.path.exists(cache_file):
-        return
+    """Reset the CMake cache if the cached target differs from the requested one.
+
+    Only CMakeCache.txt and CMakeFiles/ are dropped. Object files stay, and
+    ninja rebuilds just the ones whose command lines change with the target.
+    """
+    cached = read_cache_var(BUILD_DIR, "MSOS_TARGET")
+    if cached is not None and cached != target:
+        print(f"Target changed from {cached} to {target}, resetting CMake cache")
+        os.remove(os.path.join(BUILD_DIR, "CMakeCache.txt"))
+        shutil.rmtree(os.path.join(BUILD_DIR, "CMakeFiles"), ignore_errors=True)
+
+
+def _mtime_ns(path):
+    """mtime of path in ns from a single stat, or None if it doesn't exist."""
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def needs_reconfigure(build_dir, inputs=()):
+    """Return True if cmake has to (re)configure build_dir.
+
+    A missing CMakeCache.txt (fresh tree, or reset by check_target_mismatch)
+    or build.ninja (an interrupted configure) always needs a configure.
+    Otherwise only reconfigure when this script, the top-level CMakeLists.txt
+    or one of the given inputs is newer than the cache.
+    """
+    cache_mtime = _mtime_ns(os.path.join(build_dir, "CMakeCache.txt"))
+    if cache_mtime is None:
+        return True
+    if not os.path.exists(os.path.join(build_dir, "build.ninja")):
+        return True
+
+    top_cmakelists = os.path.join(PROJECT_DIR, "CMakeLists.txt")
+    for path in (SCRIPT_PATH, top_cmakelists, *inputs):
+        mtime = _mtime_ns(path)
+        if mtime is not None and mtime > cache_mtime:
+            return True
+    return False
+
+
+def build_type_args(build_dir, build_type):
+    """-DCMAKE_BUILD_TYPE for cmake, or nothing if the cache already has it.
+
+    Re-passing an unchanged build type would still force a configure and
+    regenerate build.ninja.
+    """
+    if read_cache_var(build_dir, "CMAKE_BUILD_TYPE") == build_type:
+        return []
+    return [f"-DCMAKE_BUILD_TYPE={build_type}"]
 
-    with open(cache_file, "r") as f:
-        for line in f:
-            if line.startswith("MSOS_TARGET:"):
-                cached = line.split("=", 1)[1].strip()
-                if cached != target:
-                    print(f"Target changed from {cached} to {target}, cleaning build dir")
-                    shutil.rmtree(BUILD_DIR)
-                return
 
+def ninja_build(build_dir):
+    """Run ninja directly in an already-configured build directory.
 
-def build_firmware(target):
+    Used for --no-reconfigure: no cmake process is started at all, so a
+    null build costs only ninja's own dependency scan.
+    """
+    if not os.path.exists(os.path.join(build_dir, "build.ninja")):
+        print(f"Error: {build_dir} is not configured. Run without --no-reconfigure first.")
+        sys.exit(1)
+    run(["ninja", "-C", build_dir, "-j", str(build_jobs())])
+
+
+def build_firmware(target, build_type="Debug", reconfigure=True):
     """Cross-compile firmware for ARM target."""
+    if not reconfigure:
+        cached_target = read_cache_var(BUILD_DIR, "MSOS_TARGET")
+        if cached_target is not None and cached_target != target:
+            print(f"Error: {BUILD_DIR} is configured for {cached_target}, not {target}. "
+                  "Run without --no-reconfigure.")
+            sys.exit(1)
+        ninja_build(BUILD_DIR)
+        return
+
     check_target_mismatch(target)
     os.makedirs(BUILD_DIR, exist_ok=True)
 
-    run([
-        "cmake",
-        "-G", "Ninja",
-        f"-DCMAKE_TOOLCHAIN_FILE={TOOLCHAIN_FILE}",
-        f"-DMSOS_TARGET={target}",
-        "-DCMAKE_BUILD_TYPE=Debug",
-        PROJECT_DIR,
-    ], cwd=BUILD_DIR)
+    type_args = build_type_args(BUILD_DIR, build_type)
+    if type_args or needs_reconfigure(BUILD_DIR, [TOOLCHAIN_FILE]):
+        run([
+            "cmake",
+            "-G", "Ninja",
+            "-S", PROJECT_DIR,
+            "-B", BUILD_DIR,
+            f"-DCMAKE_TOOLCHAIN_FILE={TOOLCHAIN_FILE}",
+            f"-DMSOS_TARGET={target}",
+            *type_args,
+            *compiler_launcher_args(),
+        ])
 
-    run(["ninja"], cwd=BUILD_DIR)
+    jobs = build_jobs()
+    run(["cmake", "--build", BUILD_DIR, "--parallel", str(jobs)], env=build_env(jobs))
 
 
-def build_tests():
+def build_tests(build_type="Debug", reconfigure=True):
     """Build and run host-side unit tests."""
-    os.makedirs(TEST_BUILD_DIR, exist_ok=True)
-
-    run([
-        "cmake",
-        "-G", "Ninja",
-        "-DCMAKE_BUILD_TYPE=Debug",
-        PROJECT_DIR,
-    ], cwd=TEST_BUILD_DIR)
-
-    run(["ninja"], cwd=TEST_BUILD_DIR)
+    if not reconfigure:
+        ninja_build(TEST_BUILD_DIR)
+    else:
+        os.makedirs(TEST_BUILD_DIR, exist_ok=True)
+
+        type_args = build_type_args(TEST_BUILD_DIR, build_type)
+        if type_args or needs_reconfigure(TEST_BUILD_DIR):
+            run([
+                "cmake",
+                "-G", "Ninja",
+                "-S", PROJECT_DIR,
+                "-B", TEST_BUILD_DIR,
+                *type_args,
+                *compiler_launcher_args(),
+            ])
+
+        jobs = build_jobs()
+        run(["cmake", "--build", TEST_BUILD_DIR, "--parallel", str(jobs)], env=build_env(jobs))
 
     run([
         "ctest",
@@ -113,13 +272,36 @@ def build_tests():
     ])
 
 
+def write_if_changed(path, data):
+    """Write bytes to path unless the file already holds exactly those bytes.
+
+    Leaving an identical file untouched keeps its mtime, so ninja does not
+    rebuild or relink anything that depends on it. New content goes to a
+    temporary file that is renamed over path, so an interrupted write never
+    leaves a truncated file behind. Returns True if written.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        pass
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return True
+
+
 def build_dtb(target=None):
     """Rebuild DTB binaries from DTS sources and generate BoardDtb.cpp files.
 
     If target is specified, only rebuild that board's DTB.
     Otherwise, rebuild all boards.
     """
-    sys.path.insert(0, TOOLS_DIR)
+    if TOOLS_DIR not in sys.path:
+        sys.path.insert(0, TOOLS_DIR)
     from build_dtbs import BOARDS as DTB_BUILDERS
     from dtb2cpp import dtb_to_cpp
 
@@ -136,35 +318,60 @@ def build_dtb(target=None):
         os.makedirs(out_dir, exist_ok=True)
 
         dtb_path = os.path.join(out_dir, "board.dtb")
-        with open(dtb_path, "wb") as f:
-            f.write(dtb_bytes)
+        dtb_note = "" if write_if_changed(dtb_path, dtb_bytes) else " (unchanged)"
 
         cpp_path = os.path.join(out_dir, "BoardDtb.cpp")
         cpp_source = dtb_to_cpp(dtb_bytes, f"boards/{name}/board.dtb")
-        with open(cpp_path, "w") as f:
-            f.write(cpp_source)
+        cpp_note = "" if write_if_changed(cpp_path, cpp_source.encode()) else " (unchanged)"
 
-        print(f"  {name}: {len(dtb_bytes)} bytes -> {dtb_path}")
-        print(f"  {name}: {cpp_path}")
+        print(f"  {name}: {len(dtb_bytes)} bytes -> {dtb_path}{dtb_note}")
+        print(f"  {name}: {cpp_path}{cpp_note}")
 
     print(f"Built {len(boards)} DTB(s)")
 
 
-def flash_jlink(target, app):
-    """Flash firmware to STM32 target via J-Link."""
-    bin_path = os.path.join(BUILD_DIR, "app", app, f"{app}.bin")
-    if not os.path.exists(bin_path):
-        print(f"Error: {bin_path} not found. Run build first.")
+def _require_artifact(path, minsize=256):
+    """Exit unless a build artifact exists and is at least minsize bytes."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        print(f"Error: {path} not found. Run build first.")
+        sys.exit(1)
+    if st.st_size < minsize:
+        print(f"Error: {path} is suspiciously small ({st.st_size} bytes). Rebuild it.")
         sys.exit(1)
+    return st
+
+
+def flash_jlink(target, app, force=False):
+    """Flash firmware to STM32 target via J-Link.
+
+    The image hash and device of the last successful flash are recorded in
+    JLINK_STAMP; flashing the same image again within JLINK_STAMP_MAX_AGE is
+    skipped unless force.
+    """
+    bin_path = app_artifact(app, ".bin")
+    _require_artifact(bin_path)
 
     jlink_device = JLINK_DEVICE_MAP.get(target, "STM32F207ZG")
 
+    import hashlib
+    import time
+
+    with open(bin_path, "rb") as f:
+        stamp = f"{jlink_device} {hashlib.sha256(f.read()).hexdigest()}\n"
+    if not force:
+        try:
+            with open(JLINK_STAMP) as f:
+                recent = time.time() - os.fstat(f.fileno()).st_mtime < JLINK_STAMP_MAX_AGE
+                if recent and f.read() == stamp:
+                    print(f"{jlink_device} already has {bin_path}, skipping flash (use --force)")
+                    return
+        except FileNotFoundError:
+            pass
+
     jlink_script = os.path.join(BUILD_DIR, "flash.jlink")
-    with open(jlink_script, "w") as f:
-        f.write(f"loadbin {bin_path}, 0x08000000\n")
-        f.write("r\n")
-        f.write("g\n")
-        f.write("q\n")
+    write_if_changed(jlink_script, f"loadbin {bin_path}, 0x08000000\nr\ng\nq\n".encode())
 
     run([
         "JLinkExe",
@@ -175,13 +382,23 @@ def flash_jlink(target, app):
         "-CommandFile", jlink_script,
     ])
 
+    # Always rewrite, so the mtime marks when this flash happened
+    with open(JLINK_STAMP, "w") as f:
+        f.write(stamp)
+
+
+def forget_jlink_flash():
+    """Drop the J-Link stamp after flashing through another path."""
+    try:
+        os.remove(JLINK_STAMP)
+    except FileNotFoundError:
+        pass
+
 
 def flash_openocd_stm32(target, app):
     """Flash firmware to STM32 target via CMSIS-DAP and OpenOCD."""
-    bin_path = os.path.join(BUILD_DIR, "app", app, f"{app}.bin")
-    if not os.path.exists(bin_path):
-        print(f"Error: {bin_path} not found. Run build first.")
-        sys.exit(1)
+    bin_path = app_artifact(app, ".bin")
+    _require_artifact(bin_path)
 
     run([
         "openocd",
@@ -194,10 +411,8 @@ def flash_openocd_stm32(target, app):
 
 def flash_openocd_stlink(target, app):
     """Flash firmware to STM32 target via ST-Link V2 and OpenOCD."""
-    bin_path = os.path.join(BUILD_DIR, "app", app, f"{app}.bin")
-    if not os.path.exists(bin_path):
-        print(f"Error: {bin_path} not found. Run build first.")
-        sys.exit(1)
+    bin_path = app_artifact(app, ".bin")
+    _require_artifact(bin_path)
 
     run([
         "openocd",
@@ -209,10 +424,8 @@ def flash_openocd_stlink(target, app):
 
 def flash_openocd(app):
     """Load firmware to PYNQ-Z2 via OpenOCD JTAG."""
-    elf_path = os.path.join(BUILD_DIR, "app", app, app)
-    if not os.path.exists(elf_path):
-        print(f"Error: {elf_path} not found. Run build first.")
-        sys.exit(1)
+    elf_path = app_artifact(app)
+    _require_artifact(elf_path)
 
     openocd_cfg = os.path.join(PROJECT_DIR, "openocd", "pynq-z2.cfg")
     if not os.path.exists(openocd_cfg):
@@ -230,7 +443,7 @@ def flash_openocd(app):
     ])
 
 
-def flash(target, app, probe="jlink"):
+def flash(target, app, probe="jlink", force=False):
     """Flash firmware to target."""
     if target == "pynq-z2":
         flash_openocd(app)
@@ -239,7 +452,9 @@ def flash(target, app, probe="jlink"):
     elif probe == "stlink":
         flash_openocd_stlink(target, app)
     else:
-        flash_jlink(target, app)
+        flash_jlink(target, app, force)
+        return
+    forget_jlink_flash()
 
 
 def main():
@@ -251,13 +466,25 @@ def main():
     parser.add_argument("-d", "--dtb", action="store_true",
                         help="Rebuild DTB(s) from DTS sources (all boards, or --target for one)")
     parser.add_argument("--app", default=None, help="App to flash (default: threads or hello)")
+    parser.add_argument("--force", action="store_true",
+                        help="Flash even if the target already has this image (J-Link)")
     parser.add_argument("--probe", default="jlink", choices=["jlink", "cmsis-dap", "stlink"],
                         help="Debug probe for flashing (default: jlink)")
     parser.add_argument("--target", default=None,
                         choices=["stm32f207zgt6", "stm32f407zgt6", "pynq-z2"],
                         help="Target MCU (default: stm32f207zgt6)")
+    parser.add_argument("--build-type", default="Debug",
+                        choices=["Debug", "Release", "RelWithDebInfo", "MinSizeRel"],
+                        help="CMake build type (default: Debug)")
+    parser.add_argument("--no-reconfigure", action="store_true",
+                        help="Skip cmake and run ninja in the existing build directory")
+    parser.add_argument("-q", "--quiet", action="store_true",
+                        help="Don't echo commands before running them")
     args = parser.parse_args()
 
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO,
+                        format="%(message)s", stream=sys.stdout)
+
     # Resolve target default (None means "not specified")
     target = args.target if args.target else "stm32f207zgt6"
 
@@ -275,13 +502,14 @@ def main():
         if not (args.test or args.flash):
             return
 
+    reconfigure = not args.no_reconfigure
     if args.test:
-        build_tests()
+        build_tests(args.build_type, reconfigure)
     elif args.flash:
-        build_firmware(target)
-        flash(target, args.app, args.probe)
+        build_firmware(target, args.build_type, reconfigure)
+        flash(target, args.app, args.probe, args.force)
     else:
-        build_firmware(target)
+        build_firmware(target, args.build_type, reconfigure)
 
 
 if __name__ == "__main__":
@@ -2,16 +2,30 @@
 Tests for tools/crash_monitor.py -- crash dump parsing and address extraction.
 """
 
+import importlib
+import io
 import sys
 import os
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 
-# Add project root to path so we can import the tool
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-sys.path.insert(0, os.path.join(PROJECT_ROOT, "tools"))
+TOOLS_DIR = os.path.join(PROJECT_ROOT, "tools")
 
-import crash_monitor
+
+class CrashMonitorTestCase(unittest.TestCase):
+    """Base class that imports tools/crash_monitor.py when the tests run.
+
+    Deferring the import keeps test collection cheap when only unrelated
+    tests are selected.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        if TOOLS_DIR not in sys.path:
+            sys.path.insert(0, TOOLS_DIR)
+        cls.cm = importlib.import_module("crash_monitor")
 
 
 SAMPLE_CRASH_DUMP = """\
@@ -43,19 +57,19 @@ EXC_RETURN: FFFFFFFD
 """
 
 
-class TestRegisterExtraction(unittest.TestCase):
+class TestRegisterExtraction(CrashMonitorTestCase):
     """Test regex matching for register values in crash dump output."""
 
     def test_extract_pc(self):
         line = "  PC  : 08000ABC"
-        match = crash_monitor.RE_REGISTER.match(line)
+        match = self.cm.RE_REGISTER.match(line)
         self.assertIsNotNone(match)
         self.assertEqual(match.group(1), "PC")
         self.assertEqual(match.group(2), "08000ABC")
 
     def test_extract_lr(self):
         line = "  LR  : 08000A34"
-        match = crash_monitor.RE_REGISTER.match(line)
+        match = self.cm.RE_REGISTER.match(line)
         self.assertIsNotNone(match)
         self.assertEqual(match.group(1), "LR")
         self.assertEqual(match.group(2), "08000A34")
@@ -63,23 +77,21 @@ class TestRegisterExtraction(unittest.TestCase):
     def test_no_match_sp(self):
         """SP is not PC or LR, should not match."""
         line = "  SP  : 200007B8"
-        match = crash_monitor.RE_REGISTER.match(line)
+        match = self.cm.RE_REGISTER.match(line)
         self.assertIsNone(match)
 
     def test_no_match_cfsr(self):
         """Fault status registers should not match."""
         line = "  CFSR : 00008200"
-        match = crash_monitor.RE_REGISTER.match(line)
+        match = self.cm.RE_REGISTER.match(line)
         self.assertIsNone(match)
 
     def test_extract_from_full_dump(self):
         """Extract PC and LR from a full crash dump."""
-        lines = SAMPLE_CRASH_DUMP.strip().split("\n")
-        addresses = {}
-        for line in lines:
-            match = crash_monitor.RE_REGISTER.match(line)
-            if match:
-                addresses[match.group(1)] = match.group(2)
+        addresses = {
+            m.group(1): m.group(2)
+            for m in self.cm.RE_REGISTER.finditer(SAMPLE_CRASH_DUMP)
+        }
 
         self.assertIn("PC", addresses)
         self.assertIn("LR", addresses)
@@ -87,56 +99,71 @@ class TestRegisterExtraction(unittest.TestCase):
         self.assertEqual(addresses["LR"], "08000A34")
         self.assertEqual(len(addresses), 2)  # Only PC and LR
 
+    def test_extract_registers_helper(self):
+        addresses = self.cm.extract_registers(SAMPLE_CRASH_DUMP)
+        self.assertEqual(addresses, {"PC": "08000ABC", "LR": "08000A34"})
+
 
-class TestCrashMarkerDetection(unittest.TestCase):
+class TestCrashMarkerDetection(CrashMonitorTestCase):
     """Test crash dump begin/end marker detection."""
 
     def test_begin_marker(self):
-        self.assertIn(crash_monitor.CRASH_BEGIN, "=== CRASH DUMP BEGIN ===")
+        self.assertIn(self.cm.CRASH_BEGIN, "=== CRASH DUMP BEGIN ===")
 
     def test_end_marker(self):
-        self.assertIn(crash_monitor.CRASH_END, "=== CRASH DUMP END ===")
+        self.assertIn(self.cm.CRASH_END, "=== CRASH DUMP END ===")
 
     def test_begin_in_line(self):
         line = "\r\n=== CRASH DUMP BEGIN ===\r\n"
-        self.assertIn(crash_monitor.CRASH_BEGIN, line)
+        self.assertIn(self.cm.CRASH_BEGIN, line)
 
 
-class TestDecodeAddresses(unittest.TestCase):
+def fake_addr2line(output):
+    """Popen stand-in that replays addr2line output followed by the sentinel."""
+    proc = MagicMock()
+    proc.stdout = io.StringIO(output + "0xffffffff\n??\n??:0\n")
+    return proc
+
+
+class TestDecodeAddresses(CrashMonitorTestCase):
     """Test addr2line invocation."""
 
-    @patch("crash_monitor.subprocess.check_output")
-    def test_decode_calls_addr2line(self, mock_check_output):
+    def setUp(self):
+        self.cm._addr2line_workers.clear()
+
+    @patch("crash_monitor.subprocess.Popen")
+    def test_decode_calls_addr2line(self, mock_popen):
         """Verify addr2line is called with correct arguments."""
-        mock_check_output.return_value = (
+        mock_popen.return_value = fake_addr2line(
             "0x08000ABC\n"
             "ledThread(void*)\n"
             "/home/user/app/threads/main.cpp:42\n"
         )
 
-        result = crash_monitor.decode_addresses(
+        result = self.cm.decode_addresses(
             "build/app/threads/threads",
             ["08000ABC"]
         )
 
-        mock_check_output.assert_called_once()
-        args = mock_check_output.call_args[0][0]
+        mock_popen.assert_called_once()
+        args = mock_popen.call_args[0][0]
         self.assertEqual(args[0], "arm-none-eabi-addr2line")
         self.assertIn("-fiaC", args)
         self.assertIn("-e", args)
         self.assertIn("build/app/threads/threads", args)
-        self.assertIn("0x08000ABC", args)
+        written = mock_popen.return_value.stdin.write.call_args[0][0]
+        self.assertIn("0x08000ABC\n", written)
 
-    @patch("crash_monitor.subprocess.check_output")
-    def test_decode_parses_output(self, mock_check_output):
+    @patch("crash_monitor.subprocess.Popen")
+    def test_decode_parses_output(self, mock_popen):
         """Verify addr2line output is parsed correctly."""
-        mock_check_output.return_value = (
+        mock_popen.return_value = fake_addr2line(
             "0x08000ABC\n"
             "ledThread(void*)\n"
             "/home/user/app/threads/main.cpp:42\n"
         )
 
-        result = crash_monitor.decode_addresses(
+        result = self.cm.decode_addresses(
             "build/app/threads/threads",
             ["08000ABC"]
         )
@@ -145,10 +172,10 @@ class TestDecodeAddresses(unittest.TestCase):
         self.assertIn("ledThread", result["08000ABC"])
         self.assertIn("main.cpp:42", result["08000ABC"])
 
-    @patch("crash_monitor.subprocess.check_output")
-    def test_decode_multiple_addresses(self, mock_check_output):
+    @patch("crash_monitor.subprocess.Popen")
+    def test_decode_multiple_addresses(self, mock_popen):
         """Verify multiple addresses are decoded."""
-        mock_check_output.return_value = (
+        mock_popen.return_value = fake_addr2line(
             "0x08000ABC\n"
             "ledThread(void*)\n"
             "/home/user/app/threads/main.cpp:42\n"
@@ -157,7 +184,7 @@ class TestDecodeAddresses(unittest.TestCase):
             "/home/user/kernel/src/core/Kernel.cpp:102\n"
         )
 
-        result = crash_monitor.decode_addresses(
+        result = self.cm.decode_addresses(
             "build/app/threads/threads",
             ["08000ABC", "08000A34"]
         )
@@ -166,41 +193,187 @@ class TestDecodeAddresses(unittest.TestCase):
         self.assertIn("08000ABC", result)
         self.assertIn("08000A34", result)
 
+    @patch("crash_monitor.subprocess.Popen")
+    def test_decode_inlined_frames(self, mock_popen):
+        """Inlined caller frames don't shift later addresses."""
+        mock_popen.return_value = fake_addr2line(
+            "0x08000abc\n"
+            "Gpio::set()\n"
+            "/home/user/hal/Gpio.h:17\n"
+            "ledThread(void*)\n"
+            "/home/user/app/threads/main.cpp:42\n"
+            "0x08000a34\n"
+            "kernel::yield()\n"
+            "/home/user/kernel/src/core/Kernel.cpp:102\n"
+        )
+
+        result = self.cm.decode_addresses(
+            "build/app/threads/threads",
+            ["08000ABC", "08000A34"]
+        )
+
+        self.assertEqual(result["08000ABC"], "Gpio::set() at /home/user/hal/Gpio.h:17")
+        self.assertIn("Kernel.cpp:102", result["08000A34"])
+
+    @patch("crash_monitor.subprocess.Popen")
+    def test_decode_reuses_process(self, mock_popen):
+        """A second crash dump for the same ELF reuses the running addr2line."""
+        proc = MagicMock()
+        proc.stdout = io.StringIO(
+            "0x08000abc\nledThread(void*)\nmain.cpp:42\n"
+            "0xffffffff\n??\n??:0\n"
+            "0x08000a34\nkernel::yield()\nKernel.cpp:102\n"
+            "0xffffffff\n??\n??:0\n"
+        )
+        mock_popen.return_value = proc
+
+        first = self.cm.decode_addresses("build/app/threads/threads", ["08000ABC"])
+        second = self.cm.decode_addresses("build/app/threads/threads", ["08000A34"])
+
+        mock_popen.assert_called_once()
+        self.assertIn("main.cpp:42", first["08000ABC"])
+        self.assertIn("Kernel.cpp:102", second["08000A34"])
+
+    @patch("crash_monitor.subprocess.Popen")
+    def test_decode_cached_address(self, mock_popen):
+        """An address seen in an earlier crash dump isn't sent again."""
+        mock_popen.return_value = fake_addr2line(
+            "0x08000abc\nledThread(void*)\nmain.cpp:42\n"
+        )
+
+        first = self.cm.decode_addresses("build/app/threads/threads", ["08000ABC"])
+        second = self.cm.decode_addresses("build/app/threads/threads", ["08000ABC"])
+
+        self.assertEqual(first, second)
+        mock_popen.return_value.stdin.write.assert_called_once()
+
+    @patch("crash_monitor.subprocess.Popen")
+    def test_decode_restarts_after_rebuild(self, mock_popen):
+        """A rebuilt ELF gets a fresh addr2line and an empty cache."""
+        mock_popen.side_effect = [
+            fake_addr2line("0x08000abc\nold()\nmain.cpp:1\n"),
+            fake_addr2line("0x08000abc\nnew()\nmain.cpp:2\n"),
+        ]
+        with tempfile.NamedTemporaryFile() as elf:
+            first = self.cm.decode_addresses(elf.name, ["08000ABC"])
+            st = os.stat(elf.name)
+            os.utime(elf.name, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+            second = self.cm.decode_addresses(elf.name, ["08000ABC"])
+
+        self.assertEqual(mock_popen.call_count, 2)
+        self.assertIn("old()", first["08000ABC"])
+        self.assertIn("new()", second["08000ABC"])
+
+    @patch("crash_monitor.subprocess.Popen")
+    def test_decode_addr2line_exits(self, mock_popen):
+        """addr2line dying (e.g. bad ELF) returns empty dict and drops the worker."""
+        proc = MagicMock()
+        proc.stdout = io.StringIO("addr2line: 'missing.elf': No such file\n")
+        mock_popen.return_value = proc
+
+        result = self.cm.decode_addresses("missing.elf", ["08000ABC"])
+
+        self.assertEqual(result, {})
+        self.assertEqual(self.cm._addr2line_workers, {})
+
     def test_decode_empty_addresses(self):
         """Empty address list returns empty dict."""
-        result = crash_monitor.decode_addresses("some.elf", [])
+        result = self.cm.decode_addresses("some.elf", [])
         self.assertEqual(result, {})
 
     def test_decode_no_elf(self):
         """No ELF path returns empty dict."""
-        result = crash_monitor.decode_addresses(None, ["08000ABC"])
+        result = self.cm.decode_addresses(None, ["08000ABC"])
         self.assertEqual(result, {})
 
-    @patch("crash_monitor.subprocess.check_output",
+    @patch("crash_monitor.subprocess.Popen",
            side_effect=FileNotFoundError)
-    def test_decode_addr2line_not_found(self, mock_check_output):
+    def test_decode_addr2line_not_found(self, mock_popen):
         """Missing addr2line returns empty dict."""
-        result = crash_monitor.decode_addresses(
+        result = self.cm.decode_addresses(
             "build/app/threads/threads",
             ["08000ABC"]
         )
         self.assertEqual(result, {})
 
 
-class TestFlashAddressRegex(unittest.TestCase):
+class FakeSerialPort:
+    """Serial port stand-in that returns canned reads, then raises Ctrl+C."""
+
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.in_waiting = 0
+        self.read_sizes = []
+
+    def read(self, size):
+        self.read_sizes.append(size)
+        if not self.chunks:
+            raise KeyboardInterrupt
+        return self.chunks.pop(0)
+
+    def close(self):
+        pass
+
+
+class TestMonitorLoop(CrashMonitorTestCase):
+    """Test line splitting and crash dump capture in monitor()."""
+
+    def run_monitor(self, chunks):
+        port = FakeSerialPort(chunks)
+        fake_serial = MagicMock()
+        fake_serial.Serial.return_value = port
+        fake_serial.SerialException = OSError
+        with patch.object(self.cm, "serial", fake_serial), \
+                patch.object(self.cm, "process_crash_dump") as process, \
+                patch("builtins.print") as mock_print:
+            self.cm.monitor("/dev/null", 115200, "app.elf")
+        printed = [str(c.args[0]) if c.args else "" for c in mock_print.call_args_list]
+        return port, process, printed
+
+    def test_lines_split_across_reads(self):
+        _, _, printed = self.run_monitor([b"hel", b"lo\r\nwor", b"ld\n"])
+        self.assertTrue(any(p.endswith("] hello") for p in printed))
+        self.assertTrue(any(p.endswith("] world") for p in printed))
+
+    def test_utf8_split_across_reads(self):
+        text = "temp 25\u00b0C\n".encode()
+        cut = text.index(b"\xb0")
+        _, _, printed = self.run_monitor([text[:cut], text[cut:]])
+        self.assertTrue(any(p.endswith("] temp 25\u00b0C") for p in printed))
+
+    def test_exit_closes_addr2line(self):
+        worker = MagicMock()
+        self.cm._addr2line_workers[("arm-none-eabi-", "app.elf")] = worker
+        self.run_monitor([])
+        worker.close.assert_called_once()
+        self.assertEqual(self.cm._addr2line_workers, {})
+
+    def test_reads_in_bulk(self):
+        port, _, _ = self.run_monitor([b"hello\n"])
+        self.assertEqual(set(port.read_sizes), {self.cm.SERIAL_READ_SIZE})
+
+    def test_crash_dump_collected(self):
+        _, process, _ = self.run_monitor([SAMPLE_CRASH_DUMP.encode()])
+        process.assert_called_once()
+        crash_lines, elf_path = process.call_args.args
+        self.assertIn("  PC  : 08000ABC", crash_lines)
+        self.assertEqual(elf_path, "app.elf")
+
+
+class TestFlashAddressRegex(CrashMonitorTestCase):
     """Test regex for matching FLASH addresses in general text."""
 
     def test_match_flash_address(self):
-        matches = crash_monitor.RE_FLASH_ADDR.findall("PC is at 08000ABC")
+        matches = self.cm.RE_FLASH_ADDR.findall("PC is at 08000ABC")
         self.assertEqual(matches, ["08000ABC"])
 
     def test_no_match_sram_address(self):
-        matches = crash_monitor.RE_FLASH_ADDR.findall("SP is at 200007B8")
+        matches = self.cm.RE_FLASH_ADDR.findall("SP is at 200007B8")
         self.assertEqual(matches, [])
 
     def test_multiple_matches(self):
         text = "08000ABC and 08000A34 are in FLASH"
-        matches = crash_monitor.RE_FLASH_ADDR.findall(text)
+        matches = self.cm.RE_FLASH_ADDR.findall(text)
         self.assertEqual(len(matches), 2)
 
 
@@ -8,6 +8,7 @@ Usage:
     python3 tools/build_dtbs.py
 """
 
+import functools
 import os
 import sys
 
@@ -17,171 +18,146 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from fdtlib import FdtNode, FdtProperty, build_dtb
 
 
-def build_stm32f207zgt6() -> bytes:
-    root = FdtNode("")
-    root.add_property(FdtProperty.from_string("compatible", "ms-os,stm32f207zgt6"))
-    root.add_property(FdtProperty.from_string("model", "STM32F207ZGT6"))
-
-    board = FdtNode("board")
-    board.add_property(FdtProperty.from_string("name", "STM32F207ZGT6"))
-    board.add_property(FdtProperty.from_string("mcu", "STM32F207ZGT6"))
-    board.add_property(FdtProperty.from_string("arch", "cortex-m3"))
-    root.add_child(board)
-
-    clocks = FdtNode("clocks")
-    clocks.add_property(FdtProperty.from_u32("system-clock", 120000000))
-    clocks.add_property(FdtProperty.from_u32("apb1-clock", 30000000))
-    clocks.add_property(FdtProperty.from_u32("apb2-clock", 60000000))
-    clocks.add_property(FdtProperty.from_u32("hse-clock", 25000000))
-    root.add_child(clocks)
-
-    memory = FdtNode("memory")
-    flash = FdtNode("flash")
-    flash.add_property(FdtProperty.from_u32_pair("reg", 0x08000000, 0x100000))
-    memory.add_child(flash)
-    sram = FdtNode("sram")
-    sram.add_property(FdtProperty.from_u32_pair("reg", 0x20000000, 0x20000))
-    memory.add_child(sram)
-    root.add_child(memory)
-
-    console = FdtNode("console")
-    console.add_property(FdtProperty.from_string("uart", "usart1"))
-    console.add_property(FdtProperty.from_u32("baud", 115200))
-    tx = FdtNode("tx")
-    tx.add_property(FdtProperty.from_string("port", "A"))
-    tx.add_property(FdtProperty.from_u32("pin", 9))
-    tx.add_property(FdtProperty.from_u32("af", 7))
-    console.add_child(tx)
-    rx = FdtNode("rx")
-    rx.add_property(FdtProperty.from_string("port", "A"))
-    rx.add_property(FdtProperty.from_u32("pin", 10))
-    rx.add_property(FdtProperty.from_u32("af", 7))
-    console.add_child(rx)
-    root.add_child(console)
-
-    led = FdtNode("led")
-    led.add_property(FdtProperty.from_string("port", "C"))
-    led.add_property(FdtProperty.from_u32("pin", 13))
-    root.add_child(led)
-
-    features = FdtNode("features")
-    root.add_child(features)
-
-    return build_dtb(root)
-
-
-def build_stm32f407zgt6() -> bytes:
-    root = FdtNode("")
-    root.add_property(FdtProperty.from_string("compatible", "ms-os,stm32f407zgt6"))
-    root.add_property(FdtProperty.from_string("model", "STM32F407ZGT6"))
-
-    board = FdtNode("board")
-    board.add_property(FdtProperty.from_string("name", "STM32F407ZGT6"))
-    board.add_property(FdtProperty.from_string("mcu", "STM32F407ZGT6"))
-    board.add_property(FdtProperty.from_string("arch", "cortex-m4"))
-    root.add_child(board)
-
-    clocks = FdtNode("clocks")
-    clocks.add_property(FdtProperty.from_u32("system-clock", 168000000))
-    clocks.add_property(FdtProperty.from_u32("apb1-clock", 42000000))
-    clocks.add_property(FdtProperty.from_u32("apb2-clock", 84000000))
-    clocks.add_property(FdtProperty.from_u32("hse-clock", 8000000))
-    root.add_child(clocks)
-
-    memory = FdtNode("memory")
-    flash = FdtNode("flash")
-    flash.add_property(FdtProperty.from_u32_pair("reg", 0x08000000, 0x100000))
-    memory.add_child(flash)
-    sram = FdtNode("sram")
-    sram.add_property(FdtProperty.from_u32_pair("reg", 0x20000000, 0x20000))
-    memory.add_child(sram)
-    ccm = FdtNode("ccm")
-    ccm.add_property(FdtProperty.from_u32_pair("reg", 0x10000000, 0x10000))
-    memory.add_child(ccm)
-    root.add_child(memory)
-
-    console = FdtNode("console")
-    console.add_property(FdtProperty.from_string("uart", "usart1"))
-    console.add_property(FdtProperty.from_u32("baud", 115200))
-    tx = FdtNode("tx")
-    tx.add_property(FdtProperty.from_string("port", "A"))
-    tx.add_property(FdtProperty.from_u32("pin", 9))
-    tx.add_property(FdtProperty.from_u32("af", 7))
-    console.add_child(tx)
-    rx = FdtNode("rx")
-    rx.add_property(FdtProperty.from_string("port", "A"))
-    rx.add_property(FdtProperty.from_u32("pin", 10))
-    rx.add_property(FdtProperty.from_u32("af", 7))
-    console.add_child(rx)
-    root.add_child(console)
-
-    led = FdtNode("led")
-    led.add_property(FdtProperty.from_string("port", "C"))
-    led.add_property(FdtProperty.from_u32("pin", 13))
-    root.add_child(led)
-
-    features = FdtNode("features")
-    features.add_property(FdtProperty.from_bool("fpu"))
-    root.add_child(features)
-
-    return build_dtb(root)
-
-
-def build_pynq_z2() -> bytes:
-    root = FdtNode("")
-    root.add_property(FdtProperty.from_string("compatible", "ms-os,pynq-z2"))
-    root.add_property(FdtProperty.from_string("model", "PYNQ-Z2"))
-
-    board = FdtNode("board")
-    board.add_property(FdtProperty.from_string("name", "PYNQ-Z2"))
-    board.add_property(FdtProperty.from_string("mcu", "Zynq-7020"))
-    board.add_property(FdtProperty.from_string("arch", "cortex-a9"))
-    root.add_child(board)
-
-    clocks = FdtNode("clocks")
-    clocks.add_property(FdtProperty.from_u32("system-clock", 650000000))
-    clocks.add_property(FdtProperty.from_u32("apb1-clock", 100000000))
-    clocks.add_property(FdtProperty.from_u32("apb2-clock", 100000000))
-    root.add_child(clocks)
-
-    memory = FdtNode("memory")
-    ddr = FdtNode("ddr")
-    ddr.add_property(FdtProperty.from_u32_pair("reg", 0x00100000, 0x1FF00000))
-    memory.add_child(ddr)
-    root.add_child(memory)
-
-    console = FdtNode("console")
-    console.add_property(FdtProperty.from_string("uart", "uart0"))
-    console.add_property(FdtProperty.from_u32("baud", 115200))
-    root.add_child(console)
-
-    features = FdtNode("features")
-    features.add_property(FdtProperty.from_bool("fpu"))
-    root.add_child(features)
-
-    return build_dtb(root)
+# Board descriptions. Each node is a dict of name -> value, where the value's
+# type picks the property encoding:
+#   str          -> string property
+#   int          -> u32 property
+#   True         -> boolean (empty) property
+#   False        -> property left out
+#   (int, int)   -> u32 pair, e.g. reg = <base size>
+#   dict         -> child node
+_STM32_CONSOLE = {
+    "uart": "usart1",
+    "baud": 115200,
+    "tx": {"port": "A", "pin": 9, "af": 7},
+    "rx": {"port": "A", "pin": 10, "af": 7},
+}
+
+STM32F207ZGT6 = {
+    "compatible": "ms-os,stm32f207zgt6",
+    "model": "STM32F207ZGT6",
+    "board": {"name": "STM32F207ZGT6", "mcu": "STM32F207ZGT6", "arch": "cortex-m3"},
+    "clocks": {
+        "system-clock": 120000000,
+        "apb1-clock": 30000000,
+        "apb2-clock": 60000000,
+        "hse-clock": 25000000,
+    },
+    "memory": {
+        "flash": {"reg": (0x08000000, 0x100000)},
+        "sram": {"reg": (0x20000000, 0x20000)},
+    },
+    "console": _STM32_CONSOLE,
+    "led": {"port": "C", "pin": 13},
+    "features": {},
+}
+
+STM32F407ZGT6 = {
+    "compatible": "ms-os,stm32f407zgt6",
+    "model": "STM32F407ZGT6",
+    "board": {"name": "STM32F407ZGT6", "mcu": "STM32F407ZGT6", "arch": "cortex-m4"},
+    "clocks": {
+        "system-clock": 168000000,
+        "apb1-clock": 42000000,
+        "apb2-clock": 84000000,
+        "hse-clock": 8000000,
+    },
+    "memory": {
+        "flash": {"reg": (0x08000000, 0x100000)},
+        "sram": {"reg": (0x20000000, 0x20000)},
+        "ccm": {"reg": (0x10000000, 0x10000)},
+    },
+    "console": _STM32_CONSOLE,
+    "led": {"port": "C", "pin": 13},
+    "features": {"fpu": True},
+}
+
+PYNQ_Z2 = {
+    "compatible": "ms-os,pynq-z2",
+    "model": "PYNQ-Z2",
+    "board": {"name": "PYNQ-Z2", "mcu": "Zynq-7020", "arch": "cortex-a9"},
+    "clocks": {
+        "system-clock": 650000000,
+        "apb1-clock": 100000000,
+        "apb2-clock": 100000000,
+    },
+    "memory": {
+        "ddr": {"reg": (0x00100000, 0x1FF00000)},
+    },
+    "console": {"uart": "uart0", "baud": 115200},
+    "features": {"fpu": True},
+}
+
 
+def _node_from_spec(name: str, spec: dict) -> FdtNode:
+    node = FdtNode(name)
+    for key, value in spec.items():
+        if isinstance(value, dict):
+            node.add_child(_node_from_spec(key, value))
+        elif value is True:
+            node.add_property(FdtProperty.from_bool(key))
+        elif value is False:
+            # A DTS boolean is false by being absent; never encode it as u32 0
+            continue
+        elif isinstance(value, str):
+            node.add_property(FdtProperty.from_string(key, value))
+        elif isinstance(value, int):
+            node.add_property(FdtProperty.from_u32(key, value))
+        elif isinstance(value, tuple) and len(value) == 2:
+            node.add_property(FdtProperty.from_u32_pair(key, *value))
+        else:
+            raise TypeError(f"Unsupported value for '{key}': {value!r}")
+    return node
+
+
+def build_from_spec(spec: dict) -> bytes:
+    """Build a DTB from a board description dict (see above)."""
+    return build_dtb(_node_from_spec("", spec))
+
+
+BOARD_SPECS = {
+    "stm32f207zgt6": STM32F207ZGT6,
+    "stm32f407zgt6": STM32F407ZGT6,
+    "pynq-z2": PYNQ_Z2,
+}
 
 BOARDS = {
-    "stm32f207zgt6": build_stm32f207zgt6,
-    "stm32f407zgt6": build_stm32f407zgt6,
-    "pynq-z2": build_pynq_z2,
+    name: functools.partial(build_from_spec, spec)
+    for name, spec in BOARD_SPECS.items()
 }
 
 
-def main():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    project_root = os.path.dirname(script_dir)
-    boards_dir = os.path.join(project_root, "boards")
+BOARDS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "boards")
+
+
+def write_dtb(path: str, dtb: bytes) -> bool:
+    """Write dtb to path unless it already holds those bytes.
 
+    The board directory is only created when the file doesn't exist yet.
+    Returns True if the file was written.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read() == dtb:
+                return False
+    except FileNotFoundError:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # One unbuffered write: the blob is small and its size is known
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.write(fd, dtb)
+    finally:
+        os.close(fd)
+    return True
+
+
+def main():
     for name, builder in BOARDS.items():
         dtb = builder()
-        out_dir = os.path.join(boards_dir, name)
-        os.makedirs(out_dir, exist_ok=True)
-        out_path = os.path.join(out_dir, "board.dtb")
-        with open(out_path, "wb") as f:
-            f.write(dtb)
-        print(f"  {name}: {len(dtb)} bytes -> {out_path}")
+        out_path = os.path.join(BOARDS_DIR, name, "board.dtb")
+        note = "" if write_dtb(out_path, dtb) else " (unchanged)"
+        print(f"  {name}: {len(dtb)} bytes -> {out_path}{note}")
 
     print(f"Built {len(BOARDS)} DTBs")
 
@@ -15,6 +15,7 @@ Usage:
 """
 
 import argparse
+import os
 import re
 import subprocess
 import sys
@@ -35,13 +36,22 @@ CYAN = "\033[96m"
 RESET = "\033[0m"
 BOLD = "\033[1m"
 
+# Bytes requested per serial read; read() returns early at the port timeout
+SERIAL_READ_SIZE = 4096
+
 # Crash dump markers
 CRASH_BEGIN = "=== CRASH DUMP BEGIN ==="
 CRASH_END = "=== CRASH DUMP END ==="
 
 # Regex to match register values in the crash dump
-# Matches lines like "  PC  : 08000ABC" or "  LR  : 08000A34"
-RE_REGISTER = re.compile(r"^\s+(PC|LR)\s*:\s*([0-9A-Fa-f]{8})\s*$")
+# Matches lines like "  PC  : 08000ABC" or "  LR  : 08000A34".
+# MULTILINE so one finditer() pass can scan a whole dump.
+RE_REGISTER = re.compile(
+    r"^[ \t]+(PC|LR)[ \t]*:[ \t]*([0-9A-Fa-f]{8})[ \t]*$", re.MULTILINE
+)
+
+# Address echo line printed by `addr2line -a`, e.g. "0x08000abc"
+RE_ADDR2LINE_ECHO = re.compile(r"^0x[0-9A-Fa-f]+[ \t]*\r?$\n?", re.MULTILINE)
 
 # Regex to match any 8-char hex value that looks like a FLASH address (0x0800xxxx)
 RE_FLASH_ADDR = re.compile(r"\b(0800[0-9A-Fa-f]{4})\b")
@@ -53,64 +63,159 @@ def timestamp():
     return now.strftime("%H:%M:%S.") + f"{now.microsecond // 1000:03d}"
 
 
+def elf_mtime(elf_path):
+    """Return the ELF's mtime in ns, or None if it can't be stat'ed."""
+    try:
+        return os.stat(elf_path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class Addr2Line:
+    """
+    Long-lived addr2line process for one ELF file.
+
+    With no addresses on the command line addr2line reads them from stdin,
+    so a single process (and a single symbol table load) serves every
+    lookup for the rest of the session.
+    """
+
+    # Address that never resolves. It is sent after each batch, and its
+    # echo line marks where the output for that batch ends.
+    SENTINEL = 0xFFFFFFFF
+
+    def __init__(self, elf_path, toolchain_prefix="arm-none-eabi-"):
+        # Decoded results by address, valid while the ELF keeps this mtime
+        self.elf_mtime = elf_mtime(elf_path)
+        self.cache = {}
+        self.proc = subprocess.Popen(
+            [f"{toolchain_prefix}addr2line", "-fiaC", "-e", elf_path],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        )
+
+    def lookup(self, addresses):
+        """
+        Return the raw addr2line output for a list of hex addresses.
+
+        Raises EOFError (carrying any output read so far) if addr2line exits.
+        """
+        request = "".join(f"0x{a}\n" for a in addresses)
+        self.proc.stdin.write(f"{request}0x{self.SENTINEL:x}\n")
+        self.proc.stdin.flush()
+
+        lines = []
+        while True:
+            line = self.proc.stdout.readline()
+            if not line:
+                raise EOFError("".join(lines).strip())
+            if line.startswith("0x") and int(line, 16) == self.SENTINEL:
+                break
+            lines.append(line)
+
+        # Sentinel's own function and location lines
+        self.proc.stdout.readline()
+        self.proc.stdout.readline()
+        return "".join(lines)
+
+    def close(self):
+        """Close stdin so addr2line exits, then reap it."""
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        self.proc.wait()
+
+
+# (toolchain_prefix, elf_path) -> Addr2Line
+_addr2line_workers = {}
+
+
+def close_addr2line_workers():
+    """Stop every running addr2line worker."""
+    while _addr2line_workers:
+        _, worker = _addr2line_workers.popitem()
+        worker.close()
+
+
+def parse_addr2line_output(output, addresses):
+    """
+    Parse `addr2line -fiaC` output for the given addresses.
+
+    Returns a dict mapping address -> "function() at file:line" string.
+    """
+    # Parse addr2line output. Format:
+    #   0x08000ABC
+    #   function_name
+    #   /path/to/file.cpp:42
+    #   (more function/location pairs if the code at 0x08000ABC was inlined)
+    # The -a echo line starts each address's block; the first pair is the
+    # innermost frame, which is the one reported.
+    result = {}
+    blocks = RE_ADDR2LINE_ECHO.split(output)[1:]
+    for addr, block in zip(addresses, blocks):
+        frame = block.strip().split("\n", 2)
+        func = frame[0].strip()
+        location = frame[1].strip() if len(frame) > 1 else "??:?"
+        if location.startswith("??"):
+            result[addr] = f"{func} at <unknown>"
+        else:
+            result[addr] = f"{func} at {location}"
+
+    return result
+
+
 def decode_addresses(elf_path, addresses, toolchain_prefix="arm-none-eabi-"):
     """
-    Run addr2line to decode a list of hex addresses to source file:line.
+    Decode a list of hex addresses to source file:line via addr2line.
+
+    The addr2line process for each ELF is started on first use and kept
+    running for later crash dumps, and addresses it has already decoded are
+    answered from its cache. Both are dropped when the ELF is rebuilt.
 
     Returns a dict mapping address -> "function() at file:line" string.
     """
     if not addresses or not elf_path:
         return {}
 
-    addr2line = f"{toolchain_prefix}addr2line"
-    cmd = [addr2line, "-fiaC", "-e", elf_path] + [f"0x{a}" for a in addresses]
+    key = (toolchain_prefix, elf_path)
+    worker = _addr2line_workers.get(key)
+    if worker is not None and worker.elf_mtime != elf_mtime(elf_path):
+        del _addr2line_workers[key]
+        worker.close()
+        worker = None
 
     try:
-        output = subprocess.check_output(cmd, stderr=subprocess.STDOUT, text=True)
+        if worker is None:
+            worker = _addr2line_workers[key] = Addr2Line(elf_path, toolchain_prefix)
+        missing = [a for a in dict.fromkeys(addresses) if a not in worker.cache]
+        if missing:
+            output = worker.lookup(missing)
+            worker.cache.update(parse_addr2line_output(output, missing))
     except FileNotFoundError:
-        print(f"{YELLOW}Warning: {addr2line} not found. "
+        print(f"{YELLOW}Warning: {toolchain_prefix}addr2line not found. "
               f"Install ARM GCC toolchain for address decoding.{RESET}")
         return {}
-    except subprocess.CalledProcessError as e:
-        print(f"{YELLOW}Warning: addr2line failed: {e.output}{RESET}")
+    except (EOFError, OSError) as e:
+        dead = _addr2line_workers.pop(key, None)
+        if dead is not None:
+            dead.close()
+        print(f"{YELLOW}Warning: addr2line failed: {e}{RESET}")
         return {}
 
-    # Parse addr2line output. Format:
-    #   0x08000ABC
-    #   function_name
-    #   /path/to/file.cpp:42
-    result = {}
-    lines = output.strip().split("\n")
-    i = 0
-    addr_idx = 0
-    while i < len(lines) and addr_idx < len(addresses):
-        line = lines[i].strip()
-
-        # Skip address echo line (starts with 0x)
-        if line.startswith("0x"):
-            i += 1
-            continue
-
-        # Function name line
-        func = line
-        i += 1
-
-        # File:line line
-        if i < len(lines):
-            location = lines[i].strip()
-            i += 1
-        else:
-            location = "??:?"
+    return {a: worker.cache[a] for a in addresses if a in worker.cache}
 
-        if addr_idx < len(addresses):
-            addr = addresses[addr_idx]
-            if location.startswith("??"):
-                result[addr] = f"{func} at <unknown>"
-            else:
-                result[addr] = f"{func} at {location}"
-            addr_idx += 1
 
-    return result
+def extract_registers(text):
+    """
+    Extract PC and LR from crash dump text in a single regex pass.
+
+    Returns a dict mapping register label -> hex address string.
+    """
+    return {m.group(1): m.group(2) for m in RE_REGISTER.finditer(text)}
 
 
 def process_crash_dump(crash_lines, elf_path):
@@ -120,14 +225,7 @@ def process_crash_dump(crash_lines, elf_path):
     2. Run addr2line to decode them
     3. Print decoded crash location
     """
-    addresses = {}  # label -> hex address
-
-    for line in crash_lines:
-        match = RE_REGISTER.match(line)
-        if match:
-            label = match.group(1)
-            addr = match.group(2)
-            addresses[label] = addr
+    addresses = extract_registers("\n".join(crash_lines))  # label -> hex address
 
     if not addresses:
         print(f"{YELLOW}No addresses found in crash dump.{RESET}")
@@ -161,35 +259,36 @@ def monitor(port, baud, elf_path):
 
     in_crash = False
     crash_lines = []
-    line_buffer = ""
-
-    while True:
-        try:
-            ser = serial.Serial(port, baud, timeout=0.1)
-            print(f"{CYAN}[{timestamp()}] Connected to {port}{RESET}")
-        except serial.SerialException as e:
-            print(f"{YELLOW}[{timestamp()}] Cannot open {port}: {e}{RESET}")
-            print(f"{YELLOW}  Retrying in 2 seconds...{RESET}")
-            time.sleep(2)
-            continue
-
-        try:
-            while True:
-                data = ser.read(ser.in_waiting or 1)
-                if not data:
-                    continue
+    line_buffer = bytearray()
 
-                # Decode bytes to string, handling partial UTF-8
-                try:
-                    text = data.decode("utf-8", errors="replace")
-                except Exception:
-                    text = data.decode("ascii", errors="replace")
+    try:
+        while True:
+            try:
+                ser = serial.Serial(port, baud, timeout=0.1)
+                print(f"{CYAN}[{timestamp()}] Connected to {port}{RESET}")
+            except serial.SerialException as e:
+                print(f"{YELLOW}[{timestamp()}] Cannot open {port}: {e}{RESET}")
+                print(f"{YELLOW}  Retrying in 2 seconds...{RESET}")
+                time.sleep(2)
+                continue
 
-                # Process character by character for line buffering
-                for ch in text:
-                    if ch == "\n":
-                        line = line_buffer.rstrip("\r")
-                        line_buffer = ""
+            try:
+                while True:
+                    # Block for up to the port timeout and take up to 4 KiB at
+                    # once, instead of polling for whatever is buffered.
+                    data = ser.read(SERIAL_READ_SIZE)
+                    if not data:
+                        continue
+
+                    # Split complete lines out of the byte buffer. Decoding per
+                    # line means a UTF-8 sequence split across reads stays intact.
+                    line_buffer += data
+                    while True:
+                        newline = line_buffer.find(b"\n")
+                        if newline < 0:
+                            break
+                        line = line_buffer[:newline].rstrip(b"\r").decode("utf-8", errors="replace")
+                        del line_buffer[:newline + 1]
 
                         # Check for crash dump markers
                         if CRASH_BEGIN in line:
@@ -210,24 +309,24 @@ def monitor(port, baud, elf_path):
                             print(f"{RED}[{timestamp()}] {line}{RESET}")
                         else:
                             print(f"[{timestamp()}] {line}")
-                    else:
-                        line_buffer += ch
 
-        except serial.SerialException:
-            print(f"{YELLOW}[{timestamp()}] Serial disconnected. Reconnecting...{RESET}")
-            try:
-                ser.close()
-            except Exception:
-                pass
-            time.sleep(1)
+            except serial.SerialException:
+                print(f"{YELLOW}[{timestamp()}] Serial disconnected. Reconnecting...{RESET}")
+                try:
+                    ser.close()
+                except Exception:
+                    pass
+                time.sleep(1)
 
-        except KeyboardInterrupt:
-            print(f"\n{CYAN}Exiting.{RESET}")
-            try:
-                ser.close()
-            except Exception:
-                pass
-            return
+            except KeyboardInterrupt:
+                print(f"\n{CYAN}Exiting.{RESET}")
+                try:
+                    ser.close()
+                except Exception:
+                    pass
+                return
+    finally:
+        close_addr2line_workers()
 
 
 def main():
@@ -6,46 +6,52 @@ Usage:
 """
 
 import argparse
+import io
 import os
-import struct
 import sys
+from typing import TextIO
 
 FDT_MAGIC = 0xD00DFEED
 
 
-def dtb_to_cpp(dtb_bytes: bytes, source_path: str = "") -> str:
-    """Convert DTB binary to C++ source with const byte array."""
+def check_dtb(dtb_bytes: bytes) -> None:
+    """Raise ValueError unless dtb_bytes starts with an FDT header magic."""
     if len(dtb_bytes) < 4:
         raise ValueError("DTB too small (less than 4 bytes)")
 
-    magic = struct.unpack(">I", dtb_bytes[:4])[0]
+    magic = int.from_bytes(dtb_bytes[:4], "big")
     if magic != FDT_MAGIC:
         raise ValueError(f"Bad DTB magic: 0x{magic:08X} (expected 0xD00DFEED)")
 
-    lines = []
+
+def dtb_to_cpp_stream(dtb_bytes: bytes, out: TextIO, source_path: str = "") -> None:
+    """Write the C++ source for a DTB to a text stream, one row at a time."""
+    check_dtb(dtb_bytes)
+
     if source_path:
-        lines.append(f"// Auto-generated from {source_path} -- DO NOT EDIT")
+        out.write(f"// Auto-generated from {source_path} -- DO NOT EDIT\n")
     else:
-        lines.append("// Auto-generated DTB blob -- DO NOT EDIT")
-    lines.append("")
-    lines.append("#include <cstdint>")
-    lines.append("")
-    lines.append('extern "C" const std::uint8_t g_boardDtb[] = {')
+        out.write("// Auto-generated DTB blob -- DO NOT EDIT\n")
+    out.write("\n#include <cstdint>\n\n")
+    out.write('extern "C" const std::uint8_t g_boardDtb[] = {\n')
 
-    # Format as 12 hex bytes per line
-    for i in range(0, len(dtb_bytes), 12):
-        chunk = dtb_bytes[i : i + 12]
-        hex_vals = ", ".join(f"0x{b:02x}" for b in chunk)
-        if i + 12 < len(dtb_bytes):
-            hex_vals += ","
-        lines.append(f"    {hex_vals}")
+    # Format as 12 hex bytes per line. hex(" ") renders each byte as "xx "
+    # in C, so a row is a fixed 36-character slice.
+    hex_str = dtb_bytes.hex(" ")
+    last = len(hex_str) - 35
+    for i in range(0, len(hex_str), 36):
+        out.write("    0x" + hex_str[i : i + 35].replace(" ", ", 0x"))
+        out.write(",\n" if i < last else "\n")
 
-    lines.append("};")
-    lines.append("")
-    lines.append('extern "C" const std::uint32_t g_boardDtbSize = sizeof(g_boardDtb);')
-    lines.append("")
+    out.write("};\n\n")
+    out.write('extern "C" const std::uint32_t g_boardDtbSize = sizeof(g_boardDtb);\n')
 
-    return "\n".join(lines)
+
+def dtb_to_cpp(dtb_bytes: bytes, source_path: str = "") -> str:
+    """Convert DTB binary to C++ source with const byte array."""
+    out = io.StringIO()
+    dtb_to_cpp_stream(dtb_bytes, out, source_path)
+    return out.getvalue()
 
 
 def main():
@@ -58,14 +64,15 @@ def main():
         dtb_bytes = f.read()
 
     source_path = os.path.basename(args.dtb)
-    cpp = dtb_to_cpp(dtb_bytes, source_path)
+    # Validate before opening the output so a bad DTB never truncates it.
+    check_dtb(dtb_bytes)
 
     if args.output:
         os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
-        with open(args.output, "w") as f:
-            f.write(cpp)
+        with open(args.output, "w", buffering=65536) as f:
+            dtb_to_cpp_stream(dtb_bytes, f, source_path)
     else:
-        sys.stdout.write(cpp)
+        dtb_to_cpp_stream(dtb_bytes, sys.stdout, source_path)
 
 
 if __name__ == "__main__":
@@ -1,7 +1,7 @@
 """Tests for dtb2cpp.py -- DTB binary to C++ converter."""
 
+import io
 import os
-import struct
 import sys
 import tempfile
 
@@ -10,7 +10,8 @@ import pytest
 # Add tools/ to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from dtb2cpp import dtb_to_cpp, FDT_MAGIC
+from build_dtbs import build_from_spec
+from dtb2cpp import dtb_to_cpp, dtb_to_cpp_stream, FDT_MAGIC
 from fdtlib import FdtNode, FdtProperty, build_dtb
 
 
@@ -51,7 +52,7 @@ def make_f407_dtb() -> bytes:
 class TestFdtlib:
     def test_magic_number(self):
         dtb = make_minimal_dtb()
-        magic = struct.unpack(">I", dtb[:4])[0]
+        magic = int.from_bytes(dtb[:4], "big")
         assert magic == FDT_MAGIC
 
     def test_header_size(self):
@@ -60,17 +61,17 @@ class TestFdtlib:
 
     def test_totalsize_matches(self):
         dtb = make_minimal_dtb()
-        totalsize = struct.unpack(">I", dtb[4:8])[0]
+        totalsize = int.from_bytes(dtb[4:8], "big")
         assert totalsize == len(dtb)
 
     def test_version(self):
         dtb = make_minimal_dtb()
-        version = struct.unpack(">I", dtb[20:24])[0]
+        version = int.from_bytes(dtb[20:24], "big")
         assert version == 17
 
     def test_f407_dtb_valid(self):
         dtb = make_f407_dtb()
-        magic = struct.unpack(">I", dtb[:4])[0]
+        magic = int.from_bytes(dtb[:4], "big")
         assert magic == FDT_MAGIC
 
     def test_string_property_in_blob(self):
@@ -92,6 +93,11 @@ class TestFdtlib:
         dtb = build_dtb(root)
         assert b"flag" in dtb
 
+    def test_spec_bools(self):
+        # True is an empty property; False leaves it out rather than u32 0
+        assert build_from_spec({"a": True, "b": False}) == build_from_spec({"a": True})
+        assert b"a\x00" in build_from_spec({"a": True})
+
     def test_reg_property_pair(self):
         root = FdtNode("")
         root.add_property(FdtProperty.from_u32_pair("reg", 0x08000000, 0x100000))
@@ -172,6 +178,33 @@ class TestDtb2Cpp:
         # Verify magic bytes present
         assert "0xd0, 0x0d, 0xfe, 0xed" in cpp
 
+    @pytest.mark.parametrize("size", [12, 24, 25, 35])
+    def test_rows_of_twelve_bytes(self, size):
+        dtb = FDT_MAGIC.to_bytes(4, "big") + bytes(range(size - 4))
+        cpp = dtb_to_cpp(dtb)
+        body = cpp[cpp.index("{\n") + 2 : cpp.index("\n};")]
+        rows = body.split("\n")
+        assert len(rows) == (size + 11) // 12
+        for row in rows[:-1]:
+            assert row.startswith("    0x") and row.endswith(",")
+            assert row.count("0x") == 12
+        assert not rows[-1].endswith(",")
+        assert rows[-1].count("0x") == size - 12 * (len(rows) - 1)
+        values = [int(v, 16) for v in body.replace(",", " ").split()]
+        assert bytes(values) == dtb
+
+    def test_stream_matches_string(self):
+        dtb = make_f407_dtb()
+        out = io.StringIO()
+        dtb_to_cpp_stream(dtb, out, "board.dtb")
+        assert out.getvalue() == dtb_to_cpp(dtb, "board.dtb")
+
+    def test_stream_bad_magic_writes_nothing(self):
+        out = io.StringIO()
+        with pytest.raises(ValueError, match="Bad DTB magic"):
+            dtb_to_cpp_stream(b"\x00" * 40, out)
+        assert out.getvalue() == ""
+
 
 # -- File I/O tests --
 
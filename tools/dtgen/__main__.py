@@ -21,9 +21,7 @@ def main():
     args = parser.parse_args()
 
     with open(args.yaml) as f:
-        yaml_str = f.read()
-
-    bd = parse_board_yaml(yaml_str)
+        bd = parse_board_yaml(f)
 
     os.makedirs(args.outdir, exist_ok=True)
 
@@ -7,7 +7,13 @@ validating required fields and types.
 
 import yaml
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, TextIO, Union
+
+# Use libyaml's C parser when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:
+    from yaml import SafeLoader as _SafeLoader
 
 
 class ValidationError(Exception):
@@ -15,9 +21,9 @@ class ValidationError(Exception):
     pass
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class BoardDescription:
-    """Parsed board description."""
+    """Parsed board description. Immutable once parsed."""
     board_name: str
     mcu: str
     arch: str
@@ -31,20 +37,107 @@ class BoardDescription:
     features: Dict[str, bool] = field(default_factory=dict)
 
 
-def _require(data: dict, key: str, context: str = "root") -> object:
-    """Require a key in a dict, raising ValidationError if missing."""
-    if key not in data or data[key] is None:
+class _Optional:
+    """Schema entry that may be absent or null.
+
+    A missing value becomes ``default``; with no default the key is left out.
+    A key given as null becomes ``null`` if set, and is otherwise treated
+    as missing.
+    """
+
+    _OMIT = object()
+
+    def __init__(self, schema, default=_OMIT, null=_OMIT):
+        self.schema = schema
+        self.default = default
+        self.null = null
+
+
+class _MappingOf:
+    """Schema for a mapping of arbitrary names to entries of one schema.
+
+    ``label`` names one entry in error messages, e.g. "Memory region".
+    """
+
+    def __init__(self, schema: dict, label: str):
+        self.schema = schema
+        self.label = label
+
+
+_PIN_SCHEMA = {"port": str, "pin": int, "af": int}
+
+# Expected layout of a board YAML file. Leaf values are the Python type the
+# field is converted to.
+BOARD_SCHEMA = {
+    "board": {"name": str, "mcu": str, "arch": str},
+    "clocks": {"system": int, "apb1": int, "apb2": int, "hse": _Optional(int)},
+    "memory": _MappingOf({"base": int, "size": int}, "Memory region"),
+    "console": {
+        "uart": str,
+        "baud": int,
+        "tx": _Optional(_PIN_SCHEMA, None),
+        "rx": _Optional(_PIN_SCHEMA, None),
+    },
+    "led": _Optional({"port": str, "pin": int}, None),
+    "features": _Optional({"fpu": _Optional(bool, null=False)}, {}),
+}
+
+
+def _walk(data: object, schema, context: str) -> object:
+    """Validate data against a schema, returning the converted values.
+
+    Keys not named in the schema are ignored.
+    """
+    if isinstance(schema, dict):
+        if not isinstance(data, dict):
+            raise ValidationError(f"Section '{context}' must be a mapping")
+        result = {}
+        for key, sub_schema in schema.items():
+            value = data.get(key)
+            if value is None:
+                if not isinstance(sub_schema, _Optional):
+                    raise ValidationError(
+                        f"Missing required field '{key}' in {context} section"
+                    )
+                if key in data and sub_schema.null is not _Optional._OMIT:
+                    result[key] = sub_schema.null
+                elif sub_schema.default is not _Optional._OMIT:
+                    default = sub_schema.default
+                    result[key] = dict(default) if isinstance(default, dict) else default
+                continue
+            if isinstance(sub_schema, _Optional):
+                sub_schema = sub_schema.schema
+            path = key if context == "root" else f"{context}.{key}"
+            result[key] = _walk(value, sub_schema, path)
+        return result
+
+    if isinstance(schema, _MappingOf):
+        if not isinstance(data, dict):
+            raise ValidationError(f"Section '{context}' must be a mapping")
+        result = {}
+        for name, entry in data.items():
+            if not isinstance(entry, dict):
+                raise ValidationError(
+                    f"{schema.label} '{name}' must be a mapping with "
+                    + " and ".join(schema.schema)
+                )
+            result[name] = _walk(entry, schema.schema, f"{context}.{name}")
+        return result
+
+    try:
+        return schema(data)
+    except (TypeError, ValueError):
         raise ValidationError(
-            f"Missing required field '{key}' in {context} section"
+            f"Field '{context}' must be {schema.__name__}, got {data!r}"
         )
-    return data[key]
 
 
-def parse_board_yaml(yaml_str: str) -> BoardDescription:
-    """Parse a YAML board description string into a BoardDescription.
+def parse_board_yaml(yaml_src: Union[str, TextIO]) -> BoardDescription:
+    """Parse a YAML board description into a BoardDescription.
 
     Args:
-        yaml_str: YAML string containing the board description.
+        yaml_src: YAML string, or an open text file that the loader reads
+            directly.
 
     Returns:
         BoardDescription with all parsed fields.
@@ -52,92 +145,33 @@ def parse_board_yaml(yaml_str: str) -> BoardDescription:
     Raises:
         ValidationError: If required fields are missing or invalid.
     """
-    if not yaml_str or not yaml_str.strip():
+    if isinstance(yaml_src, str) and not yaml_src.strip():
         raise ValidationError("Empty YAML input")
 
     try:
-        data = yaml.safe_load(yaml_str)
+        data = yaml.load(yaml_src, Loader=_SafeLoader)
     except yaml.YAMLError as e:
         raise ValidationError(f"Invalid YAML: {e}")
 
+    if data is None:
+        raise ValidationError("Empty YAML input")
     if not isinstance(data, dict):
         raise ValidationError("YAML root must be a mapping")
 
-    # ---- board section ----
-    board_section = _require(data, "board")
-    board_name = _require(board_section, "name", "board")
-    mcu = _require(board_section, "mcu", "board")
-    arch = _require(board_section, "arch", "board")
-
-    # ---- clocks section ----
-    clocks_section = _require(data, "clocks")
-    clocks = {}
-    for key in ("system", "apb1", "apb2"):
-        clocks[key] = int(_require(clocks_section, key, "clocks"))
-    if "hse" in clocks_section and clocks_section["hse"] is not None:
-        clocks["hse"] = int(clocks_section["hse"])
-
-    # ---- memory section ----
-    memory_section = _require(data, "memory")
-    memory = {}
-    for region_name, region_data in memory_section.items():
-        if not isinstance(region_data, dict):
-            raise ValidationError(
-                f"Memory region '{region_name}' must be a mapping with base and size"
-            )
-        base = _require(region_data, "base", f"memory.{region_name}")
-        size = _require(region_data, "size", f"memory.{region_name}")
-        memory[region_name] = {"base": int(base), "size": int(size)}
-
-    # ---- console section ----
-    console_section = _require(data, "console")
-    console_uart = str(_require(console_section, "uart", "console"))
-    console_baud = int(_require(console_section, "baud", "console"))
-
-    console_tx = None
-    if "tx" in console_section and console_section["tx"] is not None:
-        tx = console_section["tx"]
-        console_tx = {
-            "port": str(_require(tx, "port", "console.tx")),
-            "pin": int(_require(tx, "pin", "console.tx")),
-            "af": int(_require(tx, "af", "console.tx")),
-        }
-
-    console_rx = None
-    if "rx" in console_section and console_section["rx"] is not None:
-        rx = console_section["rx"]
-        console_rx = {
-            "port": str(_require(rx, "port", "console.rx")),
-            "pin": int(_require(rx, "pin", "console.rx")),
-            "af": int(_require(rx, "af", "console.rx")),
-        }
-
-    # ---- led section (optional) ----
-    led = None
-    if "led" in data and data["led"] is not None:
-        led_section = data["led"]
-        led = {
-            "port": str(_require(led_section, "port", "led")),
-            "pin": int(_require(led_section, "pin", "led")),
-        }
-
-    # ---- features section (optional, defaults to empty) ----
-    features = {}
-    if "features" in data and data["features"] is not None:
-        features_section = data["features"]
-        if "fpu" in features_section:
-            features["fpu"] = bool(features_section["fpu"])
+    raw = _walk(data, BOARD_SCHEMA, "root")
+    board = raw["board"]
+    console = raw["console"]
 
     return BoardDescription(
-        board_name=str(board_name),
-        mcu=str(mcu),
-        arch=str(arch),
-        clocks=clocks,
-        memory=memory,
-        console_uart=console_uart,
-        console_baud=console_baud,
-        console_tx=console_tx,
-        console_rx=console_rx,
-        led=led,
-        features=features,
+        board_name=board["name"],
+        mcu=board["mcu"],
+        arch=board["arch"],
+        clocks=raw["clocks"],
+        memory=raw["memory"],
+        console_uart=console["uart"],
+        console_baud=console["baud"],
+        console_tx=console["tx"],
+        console_rx=console["rx"],
+        led=raw["led"],
+        features=raw["features"],
     )
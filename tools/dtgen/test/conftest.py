@@ -7,6 +7,9 @@ import os
 # Add the project root to sys.path so 'tools.dtgen' is importable
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", ".."))
 
+from tools.dtgen.schema import parse_board_yaml
+from tools.dtgen.emitter import emit_board_config_h
+
 
 STM32F407_YAML = """\
 board:
@@ -121,3 +124,42 @@ def pynq_yaml():
 def minimal_yaml():
     """Minimal board YAML with no optional fields."""
     return MINIMAL_YAML
+
+
+# Parsed and emitted forms are shared by the whole session: BoardDescription
+# is frozen and tests only read it, so each fixture YAML is parsed once.
+
+@pytest.fixture(scope="session")
+def stm32f407_bd():
+    """Parsed STM32F407 BoardDescription."""
+    return parse_board_yaml(STM32F407_YAML)
+
+
+@pytest.fixture(scope="session")
+def pynq_bd():
+    """Parsed PYNQ-Z2 BoardDescription."""
+    return parse_board_yaml(PYNQ_YAML)
+
+
+@pytest.fixture(scope="session")
+def minimal_bd():
+    """Parsed minimal BoardDescription."""
+    return parse_board_yaml(MINIMAL_YAML)
+
+
+@pytest.fixture(scope="session")
+def stm32f407_code(stm32f407_bd):
+    """BoardConfig.h emitted for the STM32F407 board."""
+    return emit_board_config_h(stm32f407_bd)
+
+
+@pytest.fixture(scope="session")
+def pynq_code(pynq_bd):
+    """BoardConfig.h emitted for the PYNQ-Z2 board."""
+    return emit_board_config_h(pynq_bd)
+
+
+@pytest.fixture(scope="session")
+def minimal_code(minimal_bd):
+    """BoardConfig.h emitted for the minimal board."""
+    return emit_board_config_h(minimal_bd)
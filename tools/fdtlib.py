@@ -28,6 +28,15 @@ FDT_MAGIC = 0xD00DFEED
 FDT_VERSION = 17
 FDT_LAST_COMP_VERSION = 16
 
+# Pre-compiled big-endian layouts
+_U32 = struct.Struct(">I")
+_U32_PAIR = struct.Struct(">II")
+_PROP_HEADER = struct.Struct(">III")  # FDT_PROP, len, nameoff
+_FDT_HEADER = struct.Struct(">10I")
+
+_FDT_BEGIN_NODE_BYTES = _U32.pack(FDT_BEGIN_NODE)
+_FDT_END_NODE_BYTES = _U32.pack(FDT_END_NODE)
+
 
 class FdtProperty:
     """A device tree property with name and value."""
@@ -44,12 +53,12 @@ class FdtProperty:
     @staticmethod
     def from_u32(name: str, value: int) -> "FdtProperty":
         """Create a single uint32 property (big-endian)."""
-        return FdtProperty(name, struct.pack(">I", value))
+        return FdtProperty(name, _U32.pack(value))
 
     @staticmethod
     def from_u32_pair(name: str, val1: int, val2: int) -> "FdtProperty":
         """Create a two-element uint32 property (big-endian)."""
-        return FdtProperty(name, struct.pack(">II", val1, val2))
+        return FdtProperty(name, _U32_PAIR.pack(val1, val2))
 
     @staticmethod
     def from_bool(name: str) -> "FdtProperty":
@@ -74,73 +83,63 @@ class FdtNode:
         return self
 
 
-def _align4(size: int) -> int:
-    """Round up to 4-byte alignment."""
-    return (size + 3) & ~3
+# Zero padding that brings a length up to 4-byte alignment, indexed by
+# (-length) & 3
+_PAD = (b"", b"\x00", b"\x00\x00", b"\x00\x00\x00")
 
 
 def build_dtb(root: FdtNode) -> bytes:
     """Build a DTB binary from a root node."""
-    # Collect all property names into strings block
+    # Property names go into the strings block on first sight. The walk
+    # below is pre-order, the same order a separate strings pass would use.
     strings_map: Dict[str, int] = {}
     strings_data = bytearray()
 
-    def collect_strings(node: FdtNode):
-        for prop in node.properties:
-            if prop.name not in strings_map:
-                strings_map[prop.name] = len(strings_data)
-                strings_data.extend(prop.name.encode("ascii") + b"\x00")
-        for child in node.children:
-            collect_strings(child)
-
-    collect_strings(root)
-
-    # Build structure block
-    struct_data = bytearray()
-
-    def emit_node(node: FdtNode):
-        # FDT_BEGIN_NODE
-        struct_data.extend(struct.pack(">I", FDT_BEGIN_NODE))
-        # Node name (null-terminated, 4-byte aligned)
+    # The whole DTB is assembled in one buffer. It starts with the 40-byte
+    # header (filled in last) and the empty memory reservation block (16
+    # bytes of zeros); the structure and strings blocks are appended.
+    header_size = 40
+    off_mem_rsvmap = header_size
+    off_dt_struct = off_mem_rsvmap + 16
+    out = bytearray(off_dt_struct)
+
+    # Build structure block with an explicit stack instead of recursion.
+    # None marks where a node's FDT_END_NODE goes, after all its children.
+    stack: List[Optional[FdtNode]] = [root]
+    while stack:
+        node = stack.pop()
+        if node is None:
+            out += _FDT_END_NODE_BYTES
+            continue
+
+        # FDT_BEGIN_NODE, then the name (null-terminated, 4-byte aligned)
         name_bytes = node.name.encode("ascii") + b"\x00"
-        struct_data.extend(name_bytes)
-        # Pad to 4-byte alignment
-        pad = _align4(len(name_bytes)) - len(name_bytes)
-        struct_data.extend(b"\x00" * pad)
+        out += _FDT_BEGIN_NODE_BYTES + name_bytes + _PAD[-len(name_bytes) & 3]
 
         # Properties
         for prop in node.properties:
-            struct_data.extend(struct.pack(">I", FDT_PROP))
-            struct_data.extend(
-                struct.pack(">II", len(prop.value), strings_map[prop.name])
-            )
-            struct_data.extend(prop.value)
+            nameoff = strings_map.get(prop.name)
+            if nameoff is None:
+                nameoff = strings_map[prop.name] = len(strings_data)
+                strings_data.extend(prop.name.encode("ascii") + b"\x00")
+            out += _PROP_HEADER.pack(FDT_PROP, len(prop.value), nameoff)
+            out += prop.value
             # Pad value to 4-byte alignment
-            pad = _align4(len(prop.value)) - len(prop.value)
-            struct_data.extend(b"\x00" * pad)
-
-        # Children
-        for child in node.children:
-            emit_node(child)
+            out += _PAD[-len(prop.value) & 3]
 
-        # FDT_END_NODE
-        struct_data.extend(struct.pack(">I", FDT_END_NODE))
+        # Children, pushed in reverse so they pop in order
+        stack.append(None)
+        stack.extend(reversed(node.children))
 
-    emit_node(root)
-    struct_data.extend(struct.pack(">I", FDT_END))
+    out += _U32.pack(FDT_END)
 
-    # Memory reservation block (empty -- 16 bytes of zeros)
-    mem_rsv = b"\x00" * 16
-
-    # Header is 40 bytes
-    header_size = 40
-    off_mem_rsvmap = header_size
-    off_dt_struct = off_mem_rsvmap + len(mem_rsv)
-    off_dt_strings = off_dt_struct + len(struct_data)
-    totalsize = off_dt_strings + len(strings_data)
+    off_dt_strings = len(out)
+    size_dt_struct = off_dt_strings - off_dt_struct
+    out += strings_data
+    totalsize = len(out)
 
-    header = struct.pack(
-        ">IIIIIIIIII",
+    _FDT_HEADER.pack_into(
+        out, 0,
         FDT_MAGIC,       # magic
         totalsize,       # totalsize
         off_dt_struct,   # off_dt_struct
@@ -150,7 +149,7 @@ def build_dtb(root: FdtNode) -> bytes:
         FDT_LAST_COMP_VERSION,  # last_comp_version
         0,               # boot_cpuid_phys
         len(strings_data),  # size_dt_strings
-        len(struct_data),   # size_dt_struct
+        size_dt_struct,     # size_dt_struct
     )
 
-    return bytes(header + mem_rsv + struct_data + strings_data)
+    return bytes(out)
@@ -3,37 +3,84 @@ CLI entry point for ipcgen (embedded backend).
 
 Usage:
     python3 -m tools.ipcgen services/echo/Echo.idl --outdir gen/
+    python3 -m tools.ipcgen --batch idl_list.txt
 """
 
 import argparse
+import hashlib
 import os
+import sys
+from typing import List, Tuple
 
-from .lexer import tokenize
-from .parser import Parser
-from .embedded_emitter import (
-    emit_types_h,
-    emit_server_h,
-    emit_server_cpp,
-    emit_client_h,
-    emit_client_cpp,
+# Sidecar file in the output directory recording what was last generated
+CACHE_FILE = ".ipcgen.cache"
+
+# Modules whose source is part of the cache key, so editing the generator
+# invalidates earlier output
+_GENERATOR_MODULES = (
+    "__main__.py", "lexer.py", "parser.py", "types.py", "embedded_emitter.py",
 )
-from .types import fnv1a_32
 
 
-def main():
-    parser = argparse.ArgumentParser(description="ms-os IDL code generator (embedded)")
-    parser.add_argument("idl", help="Input .idl file")
-    parser.add_argument("--outdir", required=True, help="Output directory")
-    args = parser.parse_args()
+def input_digest(source: bytes) -> str:
+    """Hash the raw IDL bytes together with the generator's own source."""
+    h = hashlib.blake2b(source)
+    here = os.path.dirname(os.path.abspath(__file__))
+    for module in _GENERATOR_MODULES:
+        with open(os.path.join(here, module), "rb") as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+
+def is_up_to_date(outdir: str, digest: str) -> bool:
+    """True if outdir holds every file generated from an input with this digest.
+
+    The cache file is the digest on its first line, then one generated
+    filename per line.
+    """
+    try:
+        with open(os.path.join(outdir, CACHE_FILE)) as f:
+            cached = f.read().splitlines()
+    except OSError:
+        return False
+    if not cached or cached[0] != digest:
+        return False
+    return all(os.path.isfile(os.path.join(outdir, name)) for name in cached[1:])
 
-    with open(args.idl) as f:
-        text = f.read()
 
-    tokens = tokenize(text)
-    idl = Parser(tokens).parse()
+def generate(idl_path: str, outdir: str, force: bool = False,
+             verbose: bool = False) -> List[str]:
+    """Generate the C++ sources for one IDL file.
+
+    Returns the lines to report, so batch workers can hand them back to the
+    parent process instead of interleaving their output.
+    """
+    # Read raw bytes: the cache check needs no decoding, and the lexer
+    # treats \r as whitespace, so newline translation is not needed either.
+    with open(idl_path, "rb") as f:
+        source = f.read()
+
+    digest = input_digest(source)
+    if not force and is_up_to_date(outdir, digest):
+        return [f"  {outdir} is up to date"]
+
+    # Imported only once there is work to do, so --help and up-to-date runs
+    # skip loading the parser and emitter
+    from .lexer import iter_tokens
+    from .parser import Parser
+    from .embedded_emitter import (
+        emit_types_h,
+        emit_server_h,
+        emit_server_cpp,
+        emit_client_h,
+        emit_client_cpp,
+    )
+    from .types import fnv1a_32
+
+    idl = Parser(iter_tokens(source.decode("utf-8"))).parse()
 
     name = idl.service_name
-    os.makedirs(args.outdir, exist_ok=True)
+    os.makedirs(outdir, exist_ok=True)
 
     files = []
 
@@ -47,14 +94,84 @@ def main():
         (f"{name}Client.cpp", emit_client_cpp(idl)),
     ])
 
+    report = []
     for filename, content in files:
-        path = os.path.join(args.outdir, filename)
-        with open(path, "w") as f:
+        path = os.path.join(outdir, filename)
+        with open(path, "w", encoding="utf-8") as f:
             f.write(content)
-        print(f"  wrote {path}")
+        if verbose:
+            report.append(f"  wrote {path}")
+
+    # Written last, so an interrupted run is regenerated next time
+    with open(os.path.join(outdir, CACHE_FILE), "w") as f:
+        f.write("".join(f"{line}\n" for line in [digest] + [n for n, _ in files]))
+
+    report.append(f"Generated {len(files)} files for service '{name}' in {outdir} "
+                  f"(serviceId=0x{fnv1a_32(name):08x})")
+    return report
+
+
+def read_batch(path: str) -> List[Tuple[str, str]]:
+    """Read (idl, outdir) pairs from a batch file.
+
+    Each line is an IDL path and its output directory separated by
+    whitespace. Blank lines and lines starting with # are skipped.
+    """
+    jobs = []
+    with open(path) as f:
+        for lineno, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            fields = line.split()
+            if len(fields) != 2:
+                raise SystemExit(f"Error: {path}:{lineno}: expected '<idl> <outdir>'")
+            jobs.append((fields[0], fields[1]))
+    return jobs
+
+
+def generate_batch(jobs: List[Tuple[str, str]], force: bool, verbose: bool) -> int:
+    """Generate every (idl, outdir) job on a process pool. Returns the failure count.
+
+    A job that raises is reported as a failure of that file; the rest still run.
+    """
+    import concurrent.futures
+
+    failures = 0
+    with concurrent.futures.ProcessPoolExecutor() as pool:
+        futures = [pool.submit(generate, idl, outdir, force, verbose)
+                   for idl, outdir in jobs]
+        for (idl, _), future in zip(jobs, futures):
+            try:
+                print("\n".join(future.result()))
+            except Exception as e:
+                print(f"Error: {idl}: {e}")
+                failures += 1
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ms-os IDL code generator (embedded)")
+    parser.add_argument("idl", nargs="?", help="Input .idl file")
+    parser.add_argument("--outdir", help="Output directory")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Generate every '<idl> <outdir>' pair listed in FILE, in parallel")
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerate even if the outputs are up to date")
+    parser.add_argument("-v", "--verbose", action="store_true",
+                        help="List each file as it is written")
+    args = parser.parse_args()
+
+    if args.batch:
+        if args.idl or args.outdir:
+            parser.error("--batch takes no IDL file or --outdir")
+        if generate_batch(read_batch(args.batch), args.force, args.verbose):
+            sys.exit(1)
+        return
 
-    print(f"\nGenerated {len(files)} files for service '{name}' "
-          f"(serviceId=0x{fnv1a_32(name):08x})")
+    if not args.idl or not args.outdir:
+        parser.error("an IDL file and --outdir are required without --batch")
+    print("\n".join(generate(args.idl, args.outdir, args.force, args.verbose)))
 
 
 if __name__ == "__main__":
@@ -13,14 +13,12 @@ Each service produces up to five files:
 from typing import Optional
 
 from .parser import IdlFile, Method, Notification
-from .types import TYPE_MAP, cpp_type, fnv1a_32
+from .types import TYPE_MAP, fnv1a_32
 
 
 def _resolve_type(idl_type: str, idl: IdlFile) -> str:
     """Map IDL type to C++. Built-ins go through TYPE_MAP; user types pass through."""
-    if idl_type in TYPE_MAP:
-        return cpp_type(idl_type)
-    return idl_type
+    return TYPE_MAP.get(idl_type, idl_type)
 
 
 def _param_decl(p, idl: IdlFile, is_out: bool = False) -> str:
@@ -2,10 +2,11 @@
 Lexer: tokenizes IDL source text into a stream of tokens.
 """
 
-from dataclasses import dataclass
-from typing import List
+import re
+from typing import Iterator, List, NamedTuple
 
-# Token kinds.
+# Token kinds. Tokens carry these exact string objects, so kinds can be
+# compared with `is`.
 TOK_KEYWORD = "KEYWORD"
 TOK_IDENT   = "IDENT"
 TOK_NUMBER  = "NUMBER"
@@ -16,90 +17,80 @@ TOK_EOF     = "EOF"
 # Words treated as keywords by the parser.
 KEYWORDS = {"service", "notifications", "int", "void", "enum", "struct"}
 
+# Token kind for each keyword; any other word is an identifier.
+_KW_KIND = {word: TOK_KEYWORD for word in KEYWORDS}
 
-@dataclass
-class Token:
+
+class Token(NamedTuple):
     kind: str
     value: str
     line: int
 
 
-def tokenize(text: str) -> List[Token]:
+# One alternative per token class, tried in order at the current position.
+# Whitespace and // comments are unnamed, so their lastgroup is None.
+_TOKEN_RE = re.compile(r"""
+      (?P<newline>\n)
+    | [ \t\r]+
+    | //[^\n]*
+    | (?P<comment>/\*.*?\*/)
+    | \[(?P<attr>[^\]]*)\]
+    | (?P<symbol>[{}();,*=])
+    | (?P<number>\d+)
+    | (?P<word>[^\W\d]\w*)
+""", re.VERBOSE | re.DOTALL)
+
+
+def iter_tokens(text: str) -> Iterator[Token]:
     """
-    Convert IDL source text into a list of tokens.
+    Yield the tokens of IDL source text one at a time, ending with TOK_EOF.
 
     Handles: keywords, identifiers, numbers, symbols, bracketed attributes,
     single-line comments (//), block comments (/* ... */), and whitespace.
-    Raises SyntaxError on unterminated constructs or unexpected characters.
+    Raises SyntaxError on unterminated constructs or unexpected characters,
+    when the scan reaches them.
     """
-    tokens: List[Token] = []
-    i = 0
+    pos = 0
     line = 1
     n = len(text)
-
-    while i < n:
-        # Newlines
-        if text[i] == "\n":
-            line += 1
-            i += 1
-            continue
-
-        # Whitespace
-        if text[i] in " \t\r":
-            i += 1
-            continue
-
-        # Single-line comment
-        if text[i:i+2] == "//":
-            while i < n and text[i] != "\n":
-                i += 1
-            continue
-
-        # Block comment
-        if text[i:i+2] == "/*":
-            end = text.find("*/", i + 2)
-            if end == -1:
+    match = _TOKEN_RE.match
+    kw_kind = _KW_KIND.get
+    token = Token
+
+    while pos < n:
+        m = match(text, pos)
+        if m is None:
+            if text.startswith("/*", pos):
                 raise SyntaxError(f"Line {line}: unterminated block comment")
-            line += text[i:end+2].count("\n")
-            i = end + 2
-            continue
-
-        # Attribute: [something] or [something=value]
-        if text[i] == "[":
-            j = text.find("]", i)
-            if j == -1:
+            if text[pos] == "[":
                 raise SyntaxError(f"Line {line}: unterminated attribute")
-            tokens.append(Token(TOK_ATTR, text[i+1:j].strip(), line))
-            i = j + 1
-            continue
+            raise SyntaxError(f"Line {line}: unexpected character '{text[pos]}'")
 
-        # Symbols
-        if text[i] in "{}();,*=":
-            tokens.append(Token(TOK_SYMBOL, text[i], line))
-            i += 1
+        kind = m.lastgroup
+        pos = m.end()
+        if kind is None:
             continue
+        if kind == "newline":
+            line += 1
+        elif kind == "comment":
+            line += m.group().count("\n")
+        elif kind == "attr":
+            yield token(TOK_ATTR, m.group("attr").strip(), line)
+        elif kind == "symbol":
+            yield token(TOK_SYMBOL, m.group(), line)
+        elif kind == "number":
+            yield token(TOK_NUMBER, m.group(), line)
+        else:
+            word = m.group()
+            yield token(kw_kind(word, TOK_IDENT), word, line)
 
-        # Number
-        if text[i].isdigit():
-            j = i
-            while j < n and text[j].isdigit():
-                j += 1
-            tokens.append(Token(TOK_NUMBER, text[i:j], line))
-            i = j
-            continue
+    yield token(TOK_EOF, "", line)
 
-        # Identifier / keyword
-        if text[i].isalpha() or text[i] == "_":
-            j = i
-            while j < n and (text[j].isalnum() or text[j] == "_"):
-                j += 1
-            word = text[i:j]
-            kind = TOK_KEYWORD if word in KEYWORDS else TOK_IDENT
-            tokens.append(Token(kind, word, line))
-            i = j
-            continue
 
-        raise SyntaxError(f"Line {line}: unexpected character '{text[i]}'")
+def tokenize(text: str) -> List[Token]:
+    """
+    Convert IDL source text into a list of tokens.
 
-    tokens.append(Token(TOK_EOF, "", line))
-    return tokens
+    Raises any lexical SyntaxError up front; see iter_tokens().
+    """
+    return list(iter_tokens(text))
@@ -4,40 +4,44 @@ Parser: recursive-descent parser that builds an AST from a token stream.
 
 import re
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from .lexer import Token, TOK_KEYWORD, TOK_IDENT, TOK_NUMBER, TOK_SYMBOL, TOK_ATTR, TOK_EOF
 from .types import TYPE_MAP
 
+# Method / notification ID attributes, e.g. [method=1] or [notify=2].
+_METHOD_ATTR_RE = re.compile(r"method\s*=\s*(\d+)")
+_NOTIFY_ATTR_RE = re.compile(r"notify\s*=\s*(\d+)")
+
 
 # ── AST nodes ────────────────────────────────────────────────────────
 
-@dataclass
+@dataclass(slots=True)
 class EnumValue:
     name: str
     value: int
 
 
-@dataclass
+@dataclass(slots=True)
 class EnumDef:
     name: str
     values: List['EnumValue']
 
 
-@dataclass
+@dataclass(slots=True)
 class StructField:
     type_name: str   # IDL type (e.g. "uint32", "DeviceType")
     name: str
     array_size: Optional[int] = None  # e.g. 6 for uint8[6]
 
 
-@dataclass
+@dataclass(slots=True)
 class StructDef:
     name: str
     fields: List['StructField']
 
 
-@dataclass
+@dataclass(slots=True)
 class Param:
     direction: str   # "in" or "out"
     type_name: str   # IDL type (e.g. "uint32")
@@ -46,21 +50,21 @@ class Param:
     array_size: Optional[int] = None  # e.g. 16 for uint8[16]
 
 
-@dataclass
+@dataclass(slots=True)
 class Method:
     name: str
     method_id: int
     params: List[Param]
 
 
-@dataclass
+@dataclass(slots=True)
 class Notification:
     name: str
     notify_id: int
     params: List[Param]
 
 
-@dataclass
+@dataclass(slots=True)
 class IdlFile:
     service_name: str
     enums: List[EnumDef] = field(default_factory=list)
@@ -75,34 +79,60 @@ class Parser:
     """
     Recursive-descent parser for the ms-ipc IDL.
 
-    Expects a token list produced by ``tokenize()``.  Builds an ``IdlFile``
-    AST containing ``Method`` and ``Notification`` nodes.
+    Expects tokens from ``iter_tokens()`` or ``tokenize()``.  Builds an
+    ``IdlFile`` AST containing ``Method`` and ``Notification`` nodes.
     """
 
-    def __init__(self, tokens: List[Token]):
-        self.tokens = tokens
-        self.pos = 0
-        self._user_types: set = set()
+    def __init__(self, tokens: Iterable[Token]) -> None:
+        # Tokens are pulled one at a time, so a generator from iter_tokens()
+        # is parsed without ever building the whole token list. The final
+        # TOK_EOF is never consumed past.
+        self._next_token: Callable[[], Token] = iter(tokens).__next__
+        self._cur: Token = self._next_token()
+        # Built-in type names plus enums/structs defined so far, so every
+        # type check is a single set lookup.
+        self._known_types: Set[str] = set(TYPE_MAP)
+        # Top-level keyword -> handler that parses that block into the IdlFile
+        self._top_level: Dict[str, Callable[[IdlFile], None]] = {
+            "enum": self._parse_enum_into,
+            "struct": self._parse_struct_into,
+            "service": self._parse_service,
+            "notifications": self._parse_notifications,
+        }
 
     # ── Token helpers ────────────────────────────────────────────────
 
     def peek(self) -> Token:
-        return self.tokens[self.pos]
+        return self._cur
 
     def advance(self) -> Token:
-        tok = self.tokens[self.pos]
-        self.pos += 1
+        tok = self._cur
+        if tok.kind != TOK_EOF:
+            self._cur = self._next_token()
         return tok
 
-    def expect(self, kind: str, value: Optional[str] = None) -> Token:
-        tok = self.advance()
-        if tok.kind != kind:
+    def expect(self, kind: str) -> Token:
+        # advance(), inlined: expect() is the parser's most frequent call
+        tok = self._cur
+        if tok.kind != TOK_EOF:
+            self._cur = self._next_token()
+        tok_kind, tok_value, line = tok
+        if tok_kind != kind:
             raise SyntaxError(
-                f"Line {tok.line}: expected {kind}"
-                f"{f' {value!r}' if value else ''}, got {tok.kind} {tok.value!r}")
-        if value is not None and tok.value != value:
+                f"Line {line}: expected {kind}, got {tok_kind} {tok_value!r}")
+        return tok
+
+    def expect_value(self, kind: str, value: str) -> Token:
+        tok = self._cur
+        if tok.kind != TOK_EOF:
+            self._cur = self._next_token()
+        tok_kind, tok_value, line = tok
+        if tok_kind != kind:
             raise SyntaxError(
-                f"Line {tok.line}: expected {value!r}, got {tok.value!r}")
+                f"Line {line}: expected {kind} {value!r}, got {tok_kind} {tok_value!r}")
+        if tok_value != value:
+            raise SyntaxError(
+                f"Line {line}: expected {value!r}, got {tok_value!r}")
         return tok
 
     # ── Top-level ────────────────────────────────────────────────────
@@ -110,20 +140,16 @@ class Parser:
     def parse(self) -> IdlFile:
         idl = IdlFile(service_name="")
 
-        while self.peek().kind != TOK_EOF:
+        while True:
             tok = self.peek()
-            if tok.kind == TOK_KEYWORD and tok.value == "enum":
-                idl.enums.append(self._parse_enum())
-            elif tok.kind == TOK_KEYWORD and tok.value == "struct":
-                idl.structs.append(self._parse_struct())
-            elif tok.kind == TOK_KEYWORD and tok.value == "service":
-                self._parse_service(idl)
-            elif tok.kind == TOK_KEYWORD and tok.value == "notifications":
-                self._parse_notifications(idl)
-            else:
+            if tok.kind == TOK_EOF:
+                break
+            handler = self._top_level.get(tok.value) if tok.kind == TOK_KEYWORD else None
+            if handler is None:
                 raise SyntaxError(
                     f"Line {tok.line}: expected 'enum', 'struct', 'service', "
                     f"or 'notifications', got {tok.value!r}")
+            handler(idl)
 
         if not idl.service_name:
             raise SyntaxError("No service block found")
@@ -132,8 +158,8 @@ class Parser:
 
     # ── Blocks ───────────────────────────────────────────────────────
 
-    def _parse_service(self, idl: IdlFile):
-        self.expect(TOK_KEYWORD, "service")
+    def _parse_service(self, idl: IdlFile) -> None:
+        self.expect_value(TOK_KEYWORD, "service")
         name_tok = self.expect(TOK_IDENT)
         if idl.service_name and idl.service_name != name_tok.value:
             raise SyntaxError(
@@ -141,14 +167,15 @@ class Parser:
                 f"{name_tok.value!r} vs {idl.service_name!r}")
         idl.service_name = name_tok.value
 
-        self.expect(TOK_SYMBOL, "{")
+        self.expect_value(TOK_SYMBOL, "{")
+        add_method = idl.methods.append
         while self.peek().value != "}":
-            idl.methods.append(self._parse_method())
-        self.expect(TOK_SYMBOL, "}")
-        self.expect(TOK_SYMBOL, ";")
+            add_method(self._parse_method())
+        self.expect_value(TOK_SYMBOL, "}")
+        self.expect_value(TOK_SYMBOL, ";")
 
-    def _parse_notifications(self, idl: IdlFile):
-        self.expect(TOK_KEYWORD, "notifications")
+    def _parse_notifications(self, idl: IdlFile) -> None:
+        self.expect_value(TOK_KEYWORD, "notifications")
         name_tok = self.expect(TOK_IDENT)
         if idl.service_name and idl.service_name != name_tok.value:
             raise SyntaxError(
@@ -156,105 +183,101 @@ class Parser:
                 f"{name_tok.value!r} vs {idl.service_name!r}")
         idl.service_name = name_tok.value
 
-        self.expect(TOK_SYMBOL, "{")
+        self.expect_value(TOK_SYMBOL, "{")
+        add_notification = idl.notifications.append
         while self.peek().value != "}":
-            idl.notifications.append(self._parse_notification())
-        self.expect(TOK_SYMBOL, "}")
-        self.expect(TOK_SYMBOL, ";")
+            add_notification(self._parse_notification())
+        self.expect_value(TOK_SYMBOL, "}")
+        self.expect_value(TOK_SYMBOL, ";")
 
     # ── Enum / struct ──────────────────────────────────────────────────
 
+    def _parse_enum_into(self, idl: IdlFile) -> None:
+        idl.enums.append(self._parse_enum())
+
+    def _parse_struct_into(self, idl: IdlFile) -> None:
+        idl.structs.append(self._parse_struct())
+
     def _parse_enum(self) -> EnumDef:
-        self.expect(TOK_KEYWORD, "enum")
+        self.expect_value(TOK_KEYWORD, "enum")
         name_tok = self.expect(TOK_IDENT)
 
-        if name_tok.value in self._user_types or name_tok.value in TYPE_MAP:
+        if name_tok.value in self._known_types:
             raise SyntaxError(
                 f"Line {name_tok.line}: type {name_tok.value!r} already defined")
 
-        self.expect(TOK_SYMBOL, "{")
+        self.expect_value(TOK_SYMBOL, "{")
         values: List[EnumValue] = []
+        add_value = values.append
         while self.peek().value != "}":
             val_name_tok = self.expect(TOK_IDENT)
-            self.expect(TOK_SYMBOL, "=")
+            self.expect_value(TOK_SYMBOL, "=")
             val_num_tok = self.expect(TOK_NUMBER)
-            values.append(EnumValue(name=val_name_tok.value,
-                                    value=int(val_num_tok.value)))
+            add_value(EnumValue(name=val_name_tok.value,
+                                value=int(val_num_tok.value)))
             if self.peek().value == ",":
                 self.advance()  # consume optional trailing comma
-        self.expect(TOK_SYMBOL, "}")
-        self.expect(TOK_SYMBOL, ";")
+        self.expect_value(TOK_SYMBOL, "}")
+        self.expect_value(TOK_SYMBOL, ";")
 
-        self._user_types.add(name_tok.value)
+        self._known_types.add(name_tok.value)
         return EnumDef(name=name_tok.value, values=values)
 
     def _parse_struct(self) -> StructDef:
-        self.expect(TOK_KEYWORD, "struct")
+        self.expect_value(TOK_KEYWORD, "struct")
         name_tok = self.expect(TOK_IDENT)
 
-        if name_tok.value in self._user_types or name_tok.value in TYPE_MAP:
+        if name_tok.value in self._known_types:
             raise SyntaxError(
                 f"Line {name_tok.line}: type {name_tok.value!r} already defined")
 
-        self.expect(TOK_SYMBOL, "{")
+        self.expect_value(TOK_SYMBOL, "{")
         fields: List[StructField] = []
+        add_field = fields.append
         while self.peek().value != "}":
-            type_tok = self.advance()
-            if type_tok.value not in TYPE_MAP and type_tok.value not in self._user_types:
-                raise SyntaxError(
-                    f"Line {type_tok.line}: unknown type {type_tok.value!r}")
-            array_size = None
-            if self.peek().kind == TOK_ATTR and self.peek().value.strip().isdigit():
-                array_size = int(self.advance().value.strip())
-                if array_size < 1:
-                    raise SyntaxError(
-                        f"Line {type_tok.line}: array size must be >= 1")
-            if type_tok.value == "string" and array_size is None:
-                raise SyntaxError(
-                    f"Line {type_tok.line}: 'string' requires a size, "
-                    f"e.g. string[64]")
+            type_name, array_size = self._read_type_and_array()
             field_name_tok = self.expect(TOK_IDENT)
-            self.expect(TOK_SYMBOL, ";")
-            fields.append(StructField(type_name=type_tok.value,
-                                      name=field_name_tok.value,
-                                      array_size=array_size))
-        self.expect(TOK_SYMBOL, "}")
-        self.expect(TOK_SYMBOL, ";")
+            self.expect_value(TOK_SYMBOL, ";")
+            add_field(StructField(type_name=type_name,
+                                  name=field_name_tok.value,
+                                  array_size=array_size))
+        self.expect_value(TOK_SYMBOL, "}")
+        self.expect_value(TOK_SYMBOL, ";")
 
         if not fields:
             raise SyntaxError(
                 f"Line {name_tok.line}: struct {name_tok.value!r} has no fields")
 
-        self._user_types.add(name_tok.value)
+        self._known_types.add(name_tok.value)
         return StructDef(name=name_tok.value, fields=fields)
 
     # ── Methods / notifications ──────────────────────────────────────
 
     def _parse_method(self) -> Method:
         attr_tok = self.expect(TOK_ATTR)
-        m = re.match(r"method\s*=\s*(\d+)", attr_tok.value)
+        m = _METHOD_ATTR_RE.match(attr_tok.value)
         if not m:
             raise SyntaxError(
                 f"Line {attr_tok.line}: expected [method=N], got [{attr_tok.value}]")
 
-        self.expect(TOK_KEYWORD, "int")
+        self.expect_value(TOK_KEYWORD, "int")
         name_tok = self.expect(TOK_IDENT)
         params = self._parse_params()
-        self.expect(TOK_SYMBOL, ";")
+        self.expect_value(TOK_SYMBOL, ";")
 
         return Method(name=name_tok.value, method_id=int(m.group(1)), params=params)
 
     def _parse_notification(self) -> Notification:
         attr_tok = self.expect(TOK_ATTR)
-        m = re.match(r"notify\s*=\s*(\d+)", attr_tok.value)
+        m = _NOTIFY_ATTR_RE.match(attr_tok.value)
         if not m:
             raise SyntaxError(
                 f"Line {attr_tok.line}: expected [notify=N], got [{attr_tok.value}]")
 
-        self.expect(TOK_KEYWORD, "void")
+        self.expect_value(TOK_KEYWORD, "void")
         name_tok = self.expect(TOK_IDENT)
         params = self._parse_params()
-        self.expect(TOK_SYMBOL, ";")
+        self.expect_value(TOK_SYMBOL, ";")
 
         for p in params:
             if p.direction != "in":
@@ -267,31 +290,50 @@ class Parser:
     # ── Parameters ───────────────────────────────────────────────────
 
     def _parse_params(self) -> List[Param]:
-        self.expect(TOK_SYMBOL, "(")
+        self.expect_value(TOK_SYMBOL, "(")
         params: List[Param] = []
+        add_param = params.append
         if self.peek().value != ")":
-            params.append(self._parse_param())
-            while self.peek().value == ",":
+            # One loop iteration per "[in|out] type[N] name", separated by ","
+            while True:
+                attr_tok = self.expect(TOK_ATTR)
+                direction = attr_tok.value  # the lexer strips attributes
+                if direction not in ("in", "out"):
+                    raise SyntaxError(
+                        f"Line {attr_tok.line}: expected [in] or [out], got [{direction}]")
+
+                type_name, array_size = self._read_type_and_array()
+                name_tok = self.expect(TOK_IDENT)
+
+                # [out] implies pointer — no * needed in IDL syntax.
+                add_param(Param(direction=direction, type_name=type_name,
+                                name=name_tok.value,
+                                is_pointer=(direction == "out"),
+                                array_size=array_size))
+
+                if self.peek().value != ",":
+                    break
                 self.advance()
-                params.append(self._parse_param())
-        self.expect(TOK_SYMBOL, ")")
+        self.expect_value(TOK_SYMBOL, ")")
         return params
 
-    def _parse_param(self) -> Param:
-        attr_tok = self.expect(TOK_ATTR)
-        direction = attr_tok.value.strip()
-        if direction not in ("in", "out"):
-            raise SyntaxError(
-                f"Line {attr_tok.line}: expected [in] or [out], got [{direction}]")
+    # ── Types ────────────────────────────────────────────────────────
 
+    def _read_type_and_array(self) -> Tuple[str, Optional[int]]:
+        """Read a known type name and its optional [N] array size.
+
+        Shared by struct fields and method params. ``string`` must have a size.
+        """
         type_tok = self.advance()
-        if type_tok.value not in TYPE_MAP and type_tok.value not in self._user_types:
+        if type_tok.value not in self._known_types:
             raise SyntaxError(
                 f"Line {type_tok.line}: unknown type {type_tok.value!r}")
 
         array_size = None
-        if self.peek().kind == TOK_ATTR and self.peek().value.strip().isdigit():
-            array_size = int(self.advance().value.strip())
+        nxt = self.peek()
+        if nxt.kind == TOK_ATTR and nxt.value.isdigit():
+            self.advance()
+            array_size = int(nxt.value)
             if array_size < 1:
                 raise SyntaxError(
                     f"Line {type_tok.line}: array size must be >= 1")
@@ -301,11 +343,4 @@ class Parser:
                 f"Line {type_tok.line}: 'string' requires a size, "
                 f"e.g. string[64]")
 
-        name_tok = self.expect(TOK_IDENT)
-
-        # [out] implies pointer — no * needed in IDL syntax.
-        is_pointer = (direction == "out")
-
-        return Param(direction=direction, type_name=type_tok.value,
-                     name=name_tok.value, is_pointer=is_pointer,
-                     array_size=array_size)
+        return type_tok.value, array_size
@@ -61,15 +61,23 @@ service DeviceManager
 """
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def echo_idl():
     """Parsed Echo IDL."""
     tokens = tokenize(ECHO_IDL)
     return Parser(tokens).parse()
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def typed_idl():
     """Parsed DeviceManager IDL with enums and structs."""
     tokens = tokenize(TYPED_IDL)
     return Parser(tokens).parse()
+
+
+@pytest.fixture
+def echo_idl_path(tmp_path):
+    """Echo IDL written to a file in the test's temporary directory."""
+    path = tmp_path / "Echo.idl"
+    path.write_text(ECHO_IDL)
+    return path
@@ -0,0 +1,94 @@
+"""Tests for the ipcgen IDL lexer."""
+
+import pytest
+
+from tools.ipcgen.lexer import (
+    iter_tokens,
+    tokenize,
+    TOK_ATTR,
+    TOK_EOF,
+    TOK_IDENT,
+    TOK_KEYWORD,
+    TOK_NUMBER,
+    TOK_SYMBOL,
+)
+
+
+def kinds_values(text):
+    return [(t.kind, t.value) for t in tokenize(text)]
+
+
+class TestTokens:
+    def test_keywords_and_identifiers(self):
+        assert kinds_values("service Echo") == [
+            (TOK_KEYWORD, "service"),
+            (TOK_IDENT, "Echo"),
+            (TOK_EOF, ""),
+        ]
+
+    def test_symbols_and_numbers(self):
+        assert kinds_values("A = 12,") == [
+            (TOK_IDENT, "A"),
+            (TOK_SYMBOL, "="),
+            (TOK_NUMBER, "12"),
+            (TOK_SYMBOL, ","),
+            (TOK_EOF, ""),
+        ]
+
+    def test_number_then_identifier(self):
+        assert kinds_values("12ab") == [
+            (TOK_NUMBER, "12"),
+            (TOK_IDENT, "ab"),
+            (TOK_EOF, ""),
+        ]
+
+    def test_attribute_is_stripped(self):
+        assert kinds_values("[ method=1 ]")[0] == (TOK_ATTR, "method=1")
+
+    def test_comments_skipped(self):
+        assert kinds_values("// line\n/* block\n */ x") == [
+            (TOK_IDENT, "x"),
+            (TOK_EOF, ""),
+        ]
+
+    def test_token_is_immutable(self):
+        tok = tokenize("x")[0]
+        with pytest.raises(AttributeError):
+            tok.value = "y"
+
+    def test_token_unpacks(self):
+        kind, value, line = tokenize("x")[0]
+        assert (kind, value, line) == (TOK_IDENT, "x", 1)
+
+    def test_iter_tokens_matches_tokenize(self):
+        text = "service Echo { [method=1] int Ping([in] uint32 v); };"
+        assert list(iter_tokens(text)) == tokenize(text)
+
+    def test_iter_tokens_is_lazy(self):
+        tokens = iter_tokens("service $")
+        assert next(tokens) == (TOK_KEYWORD, "service", 1)
+        with pytest.raises(SyntaxError, match="unexpected character"):
+            next(tokens)
+
+
+class TestLineNumbers:
+    def test_lines_counted_through_block_comment(self):
+        tokens = tokenize("a\n/* one\ntwo */\nb")
+        assert [(t.value, t.line) for t in tokens] == [("a", 1), ("b", 4), ("", 4)]
+
+    def test_eof_on_last_line(self):
+        assert tokenize("a\n\n")[-1].line == 3
+
+
+class TestErrors:
+    def test_unterminated_block_comment(self):
+        with pytest.raises(SyntaxError, match="Line 2: unterminated block comment"):
+            tokenize("a\n/* never closed")
+
+    def test_unterminated_attribute(self):
+        with pytest.raises(SyntaxError, match="unterminated attribute"):
+            tokenize("[method=1")
+
+    def test_unexpected_character(self):
+        with pytest.raises(SyntaxError, match="unexpected character '\\$'"):
+            tokenize("service $")
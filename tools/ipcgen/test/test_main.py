@@ -0,0 +1,106 @@
+"""Tests for the ipcgen command line: output cache and batch generation."""
+
+import os
+import shutil
+
+import pytest
+
+import tools.ipcgen.__main__ as ipcgen_main
+from tools.ipcgen.__main__ import generate, generate_batch, read_batch
+
+
+class TestReadBatch:
+    def test_reads_pairs(self, tmp_path):
+        batch = tmp_path / "batch.txt"
+        batch.write_text("a.idl out/a\n  b.idl\tout/b  \n")
+        assert read_batch(str(batch)) == [("a.idl", "out/a"), ("b.idl", "out/b")]
+
+    def test_skips_blank_and_comment_lines(self, tmp_path):
+        batch = tmp_path / "batch.txt"
+        batch.write_text("# services\n\na.idl out/a\n   \n")
+        assert read_batch(str(batch)) == [("a.idl", "out/a")]
+
+    def test_bad_line_reports_line_number(self, tmp_path):
+        batch = tmp_path / "batch.txt"
+        batch.write_text("a.idl out/a\nb.idl\n")
+        with pytest.raises(SystemExit, match="batch.txt:2: expected"):
+            read_batch(str(batch))
+
+
+class TestGenerateBatch:
+    def test_all_succeed(self, tmp_path, echo_idl_path, capsys):
+        jobs = [(str(echo_idl_path), str(tmp_path / "a")), (str(echo_idl_path), str(tmp_path / "b"))]
+        assert generate_batch(jobs, force=False, verbose=False) == 0
+        assert (tmp_path / "a" / "EchoServer.h").is_file()
+        assert (tmp_path / "b" / "EchoServer.h").is_file()
+
+    def test_counts_each_failure(self, tmp_path, echo_idl_path, capsys):
+        bad_syntax = tmp_path / "Bad.idl"
+        bad_syntax.write_text("service $")
+        bad_utf8 = tmp_path / "Latin1.idl"
+        bad_utf8.write_bytes(b"service \xe9cho {};")
+        jobs = [
+            (str(bad_syntax), str(tmp_path / "bad")),
+            (str(echo_idl_path), str(tmp_path / "echo")),
+            (str(bad_utf8), str(tmp_path / "latin1")),
+            (str(tmp_path / "Missing.idl"), str(tmp_path / "missing")),
+        ]
+        assert generate_batch(jobs, force=False, verbose=False) == 3
+        assert (tmp_path / "echo" / "EchoServer.h").is_file()
+
+        out = capsys.readouterr().out
+        assert f"Error: {bad_syntax}:" in out
+        assert f"Error: {bad_utf8}:" in out
+        assert "Generated 4 files for service 'Echo'" in out
+
+    def test_output_in_job_order(self, tmp_path, echo_idl_path, capsys):
+        outdirs = [str(tmp_path / f"out{i}") for i in range(6)]
+        generate_batch([(str(echo_idl_path), d) for d in outdirs], force=False, verbose=False)
+
+        lines = capsys.readouterr().out.splitlines()
+        assert [line.split(" in ")[1].split(" ")[0] for line in lines] == outdirs
+
+
+class TestCache:
+    """Generation is skipped while .ipcgen.cache matches the inputs."""
+
+    def run(self, idl_path, outdir, force=False):
+        return generate(str(idl_path), str(outdir), force=force)[-1]
+
+    def test_unchanged_idl_is_skipped(self, tmp_path, echo_idl_path):
+        outdir = tmp_path / "out"
+        assert self.run(echo_idl_path, outdir).startswith("Generated")
+        assert self.run(echo_idl_path, outdir).endswith("is up to date")
+
+    def test_edited_idl_regenerates(self, tmp_path, echo_idl_path):
+        outdir = tmp_path / "out"
+        self.run(echo_idl_path, outdir)
+        echo_idl_path.write_text(echo_idl_path.read_text() + "\n// edited\n")
+        assert self.run(echo_idl_path, outdir).startswith("Generated")
+
+    def test_deleted_output_regenerates(self, tmp_path, echo_idl_path):
+        outdir = tmp_path / "out"
+        self.run(echo_idl_path, outdir)
+        (outdir / "EchoClient.cpp").unlink()
+        assert self.run(echo_idl_path, outdir).startswith("Generated")
+        assert (outdir / "EchoClient.cpp").is_file()
+
+    def test_changed_generator_regenerates(self, tmp_path, echo_idl_path, monkeypatch):
+        # Hash a copy of the generator sources, then edit one of them
+        gen_dir = tmp_path / "gen"
+        gen_dir.mkdir()
+        src_dir = os.path.dirname(os.path.abspath(ipcgen_main.__file__))
+        for module in ipcgen_main._GENERATOR_MODULES:
+            shutil.copy(os.path.join(src_dir, module), gen_dir / module)
+        monkeypatch.setattr(ipcgen_main, "__file__", str(gen_dir / "__main__.py"))
+
+        outdir = tmp_path / "out"
+        self.run(echo_idl_path, outdir)
+        with open(gen_dir / "embedded_emitter.py", "a") as f:
+            f.write("\n# edited\n")
+        assert self.run(echo_idl_path, outdir).startswith("Generated")
+
+    def test_force_regenerates(self, tmp_path, echo_idl_path):
+        outdir = tmp_path / "out"
+        self.run(echo_idl_path, outdir)
+        assert self.run(echo_idl_path, outdir, force=True).startswith("Generated")
@@ -0,0 +1,12 @@
+"""Tests for the ipcgen IDL parser."""
+
+from tools.ipcgen.lexer import Token, tokenize
+from tools.ipcgen.parser import Parser
+
+
+class TestTokenInput:
+    def test_accepts_tokens_built_elsewhere(self):
+        # Kinds equal to the lexer's constants but not the same string objects
+        tokens = [Token("".join(kind), value, line)
+                  for kind, value, line in tokenize("service S { [method=1] int Ping(); };")]
+        assert Parser(tokens).parse().service_name == "S"
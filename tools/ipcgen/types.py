@@ -2,8 +2,12 @@
 Type system: IDL-to-C++ type mapping and FNV-1a hash for service IDs.
 """
 
-# IDL type name → C++ type name.
-TYPE_MAP = {
+import functools
+from types import MappingProxyType
+
+# IDL type name → C++ type name. Read-only, since the parser seeds its
+# known types from it.
+TYPE_MAP = MappingProxyType({
     "uint8":   "uint8_t",
     "uint16":  "uint16_t",
     "uint32":  "uint32_t",
@@ -16,7 +20,7 @@ TYPE_MAP = {
     "float64": "double",
     "bool":    "bool",
     "string":  "char",
-}
+})
 
 
 def cpp_type(idl_type: str) -> str:
@@ -24,8 +28,12 @@ def cpp_type(idl_type: str) -> str:
     return TYPE_MAP[idl_type]
 
 
+@functools.lru_cache(maxsize=256)
 def fnv1a_32(s: str) -> int:
-    """FNV-1a 32-bit hash. Used to derive serviceId from the service name."""
+    """FNV-1a 32-bit hash. Used to derive serviceId from the service name.
+
+    Cached, since each service's name is hashed by several emitters.
+    """
     h = 0x811c9dc5
     for b in s.encode("utf-8"):
         h ^= b